@@ -0,0 +1,216 @@
+"""
+Precomputed superadmin analytics.
+
+Counters in api_analyticscounter, one row per (metric, key), are kept current
+incrementally: donation inserts, status changes and deletes, and recipient and
+NGO inserts, city changes and deletes each apply small ``F()`` deltas, so the
+admin dashboard never runs ``COUNT(*)`` or ``GROUP BY`` over the big tables.
+Top-k recipient cities are read off the (metric, value) index.
+
+``snapshot()`` assembles the dashboard payload from the counters and caches it
+for ANALYTICS_MAX_AGE seconds; ``refresh=True`` rebuilds it immediately.
+``rebuild_analytics()`` recomputes every counter from the source tables.
+"""
+import datetime
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F
+from django.db.models.functions import TruncDate
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import metrics
+from .models import AnalyticsCounter, Donation, NGO, Recipient
+from .rollups import add_or_create
+from .signals import donations_created, donations_status_changed
+
+DONATIONS = 'donations'
+BY_STATUS = 'donations_by_status'
+BY_CATEGORY = 'donations_by_category'
+BY_DAY = 'donations_by_day'
+NGOS = 'ngos'
+# Donations per NGO past the pending stage; an NGO with any is active
+NGO_HANDLED = 'ngo_handled'
+RECIPIENTS_BY_CITY = 'recipients_by_city'
+
+# Matching assigns (or reassigns) a donation's NGO only while it is pending
+PENDING = 'pending'
+
+SNAPSHOT_KEY = 'analytics:snapshot'
+
+
+def apply_deltas(deltas):
+    """Add a Counter of {(metric, key): delta} to the counter rows, creating missing rows."""
+    for (metric, key), value in deltas.items():
+        if not value:
+            continue
+        add_or_create(AnalyticsCounter, {'metric': metric, 'key': key}, {'value': F('value') + value}, {'value': value})
+
+
+def _donation_deltas(donation, sign=1):
+    deltas = Counter({
+        (DONATIONS, ''): sign,
+        (BY_STATUS, donation.status): sign,
+        (BY_CATEGORY, donation.category): sign,
+        (BY_DAY, timezone.localdate(donation.created_at).isoformat()): sign,
+    })
+    if donation.ngo_id is not None and donation.status != PENDING:
+        deltas[(NGO_HANDLED, str(donation.ngo_id))] += sign
+    return deltas
+
+
+@receiver(donations_created)
+def _on_donations_created(sender, donations, **kwargs):
+    deltas = Counter()
+    for donation in donations:
+        deltas.update(_donation_deltas(donation))
+    apply_deltas(deltas)
+
+
+@receiver(donations_status_changed)
+def _on_status_changed(sender, donation_ids, old_status, new_status, **kwargs):
+    n = len(donation_ids)
+    deltas = Counter({(BY_STATUS, old_status): -n, (BY_STATUS, new_status): n})
+    if (old_status == PENDING) != (new_status == PENDING):
+        sign = 1 if old_status == PENDING else -1
+        per_ngo = (
+            Donation.objects.filter(donation_id__in=donation_ids, ngo__isnull=False)
+            .values_list('ngo_id').annotate(n=Count('donation_id')).values_list('ngo_id', 'n')
+        )
+        for ngo_id, count in per_ngo:
+            deltas[(NGO_HANDLED, str(ngo_id))] += sign * count
+    apply_deltas(deltas)
+
+
+@receiver(post_delete, sender=Donation)
+def _on_donation_deleted(sender, instance, **kwargs):
+    apply_deltas(_donation_deltas(instance, sign=-1))
+
+
+def users_created(role, users):
+    """Count users stored with ``bulk_create`` (the importer), which sends no post_save."""
+    if role == 'recipient':
+        apply_deltas(Counter((RECIPIENTS_BY_CITY, user.city) for user in users))
+    elif role == 'ngo':
+        apply_deltas(Counter({(NGOS, ''): len(users)}))
+
+
+@receiver(pre_save, sender=Recipient)
+def _remember_old_city(sender, instance, raw=False, update_fields=None, **kwargs):
+    instance._old_city = None
+    if raw or instance._state.adding or instance.pk is None:
+        return
+    if update_fields is not None and 'city' not in update_fields:
+        return
+    instance._old_city = Recipient.objects.filter(pk=instance.pk).values_list('city', flat=True).first()
+
+
+@receiver(post_save, sender=Recipient)
+def _on_recipient_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        users_created('recipient', [instance])
+        return
+    old_city = getattr(instance, '_old_city', None)
+    if old_city is not None and old_city != instance.city:
+        apply_deltas(Counter({(RECIPIENTS_BY_CITY, old_city): -1, (RECIPIENTS_BY_CITY, instance.city): 1}))
+
+
+@receiver(post_delete, sender=Recipient)
+def _on_recipient_deleted(sender, instance, **kwargs):
+    apply_deltas(Counter({(RECIPIENTS_BY_CITY, instance.city): -1}))
+
+
+@receiver(post_save, sender=NGO)
+def _on_ngo_saved(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        users_created('ngo', [instance])
+
+
+@receiver(post_delete, sender=NGO)
+def _on_ngo_deleted(sender, instance, **kwargs):
+    apply_deltas(Counter({(NGOS, ''): -1}))
+    # Its donations keep their status but lose the NGO (SET_NULL)
+    AnalyticsCounter.objects.filter(metric=NGO_HANDLED, key=str(instance.ngo_id)).delete()
+
+
+def _values(metric):
+    rows = AnalyticsCounter.objects.filter(metric=metric, value__gt=0).order_by('key').values_list('key', 'value')
+    return dict(rows)
+
+
+def _total(metric):
+    return AnalyticsCounter.objects.filter(metric=metric, key='').values_list('value', flat=True).first() or 0
+
+
+def compute_snapshot():
+    """The superadmin dashboard payload, read from the counters only."""
+    top_cities = (
+        AnalyticsCounter.objects.filter(metric=RECIPIENTS_BY_CITY, value__gt=0)
+        .order_by('-value', 'key').values_list('key', 'value')[:settings.ANALYTICS_TOP_CITIES]
+    )
+    first_day = (timezone.localdate() - datetime.timedelta(days=settings.ANALYTICS_DAYS - 1)).isoformat()
+    by_day = (
+        AnalyticsCounter.objects.filter(metric=BY_DAY, key__gte=first_day, value__gt=0)
+        .order_by('key').values_list('key', 'value')
+    )
+    return {
+        'donation_count': _total(DONATIONS),
+        'top_cities': [{'city': city, 'count': count} for city, count in top_cities],
+        'donations_by_status': _values(BY_STATUS),
+        'donations_by_category': _values(BY_CATEGORY),
+        'donations_by_day': dict(by_day),
+        'ngo_count': _total(NGOS),
+        'active_ngos': AnalyticsCounter.objects.filter(metric=NGO_HANDLED, value__gt=0).count(),
+        'generated_at': timezone.now().isoformat(),
+        'max_age': settings.ANALYTICS_MAX_AGE,
+    }
+
+
+def snapshot(refresh=False):
+    """Cached compute_snapshot(), at most ANALYTICS_MAX_AGE seconds old unless ``refresh``."""
+    data = None if refresh else cache.get(SNAPSHOT_KEY)
+    if data is not None:
+        metrics.incr('analytics.snapshot.hits')
+        return data
+    metrics.incr('analytics.snapshot.refreshes' if refresh else 'analytics.snapshot.misses')
+    data = compute_snapshot()
+    cache.set(SNAPSHOT_KEY, data, settings.ANALYTICS_MAX_AGE)
+    return data
+
+
+def rebuild_analytics(batch_size=1000):
+    """Recompute every counter from the source tables; return the row count."""
+    values = {}
+    values[(DONATIONS, '')] = Donation.objects.count()
+    for status, n in Donation.objects.values_list('status').annotate(n=Count('donation_id')).values_list('status', 'n'):
+        values[(BY_STATUS, status)] = n
+    by_category = Donation.objects.values_list('category').annotate(n=Count('donation_id'))
+    for category, n in by_category.values_list('category', 'n'):
+        values[(BY_CATEGORY, category)] = n
+    by_day = Donation.objects.annotate(day=TruncDate('created_at')).values_list('day').annotate(n=Count('donation_id'))
+    for day, n in by_day.values_list('day', 'n'):
+        values[(BY_DAY, day.isoformat())] = n
+    handled = (
+        Donation.objects.filter(ngo__isnull=False).exclude(status=PENDING)
+        .values_list('ngo_id').annotate(n=Count('donation_id')).values_list('ngo_id', 'n')
+    )
+    for ngo_id, n in handled:
+        values[(NGO_HANDLED, str(ngo_id))] = n
+    values[(NGOS, '')] = NGO.objects.count()
+    for city, n in Recipient.objects.values_list('city').annotate(n=Count('recipient_id')).values_list('city', 'n'):
+        values[(RECIPIENTS_BY_CITY, city)] = n
+
+    with transaction.atomic():
+        AnalyticsCounter.objects.all().delete()
+        AnalyticsCounter.objects.bulk_create(
+            [AnalyticsCounter(metric=metric, key=key, value=value) for (metric, key), value in values.items()],
+            batch_size=batch_size,
+        )
+    cache.delete(SNAPSHOT_KEY)
+    return len(values)
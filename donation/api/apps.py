@@ -5,4 +5,8 @@ class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
 
+    def ready(self):
+        # Connect signal receivers that keep rollups and caches current
+        from . import analytics, credentials, ngo_index, ratings, response_cache, signals, stats, trends  # noqa: F401
+
 
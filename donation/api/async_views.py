@@ -0,0 +1,85 @@
+"""
+Async versions of the hot read endpoints, routed in place of the DRF views when
+settings.ASYNC_VIEWS is on (the ASGI deployment, see project/asgi.py).
+
+GET and HEAD run on Django's async ORM and render the same JSON as the DRF
+views (lists through api/fast_serializers.py), so a slow query waits on the
+event loop instead of holding a worker thread. Other methods are handed to the
+sync DRF view, which handles writes and the 405 responses.
+"""
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.exceptions import APIException
+from rest_framework.renderers import JSONRenderer
+
+from .filters import FilterError
+from .models import Donor, Recipient, NGO, Donation
+from .pagination import KeysetPaginator
+from . import fast_serializers, response_cache, services, views
+from project.db_routers import replica_reads
+
+READ_METHODS = ('GET', 'HEAD')
+
+
+def _json(data, status=200):
+    return HttpResponse(JSONRenderer().render(data), status=status, content_type='application/json')
+
+
+async def health(request):
+    if request.method not in READ_METHODS:
+        return await sync_to_async(views.health)(request)
+    return _json({'status': 'ok'})
+
+
+def _list_view(sync_view, resource, pk_name, get_queryset, encoder, listing=None):
+    @csrf_exempt
+    @replica_reads
+    async def view(request):
+        if request.method not in READ_METHODS:
+            return await sync_to_async(sync_view)(request)
+
+        try:
+            selection, queryset, ordering, depends = (
+                listing(request.GET) if listing else (encoder, get_queryset(), None, ())
+            )
+        except FilterError as e:
+            return _json({'error': str(e)}, status=400)
+
+        async def body():
+            return await selection.apaginate(KeysetPaginator(request, pk_name, ordering), queryset)
+        try:
+            return await response_cache.arespond(request, resource, None, aget_body=body, depends=depends)
+        except APIException as exc:
+            return _json({'detail': exc.detail}, status=exc.status_code)
+    view.__name__ = view.__qualname__ = sync_view.__name__
+    return view
+
+
+def _detail_view(sync_view, role, pk_name):
+    @replica_reads
+    async def view(request, **kwargs):
+        if request.method not in READ_METHODS:
+            return await sync_to_async(sync_view)(request, **kwargs)
+        user_id = kwargs[pk_name]
+        try:
+            return await response_cache.arespond(request, role, user_id, lambda: services.aget_profile(role, user_id))
+        except services.ServiceError as e:
+            return _json(e.errors, status=e.status)
+    view.__name__ = view.__qualname__ = sync_view.__name__
+    return view
+
+
+donors_list_create = _list_view(views.donors_list_create, 'donor', 'donor_id', Donor.objects.all, fast_serializers.donors)
+recipients_list_create = _list_view(
+    views.recipients_list_create, 'recipient', 'recipient_id', Recipient.objects.all, fast_serializers.recipients,
+)
+ngos_list_create = _list_view(views.ngos_list_create, 'ngo', 'ngo_id', NGO.objects.all, fast_serializers.ngos)
+donations_list_create = _list_view(
+    views.donations_list_create, 'donation', 'donation_id', Donation.objects.all, fast_serializers.donations,
+    listing=views.donation_listing,
+)
+
+donor_detail = _detail_view(views.donor_detail, 'donor', 'donor_id')
+recipient_detail = _detail_view(views.recipient_detail, 'recipient', 'recipient_id')
+ngo_detail = _detail_view(views.ngo_detail, 'ngo', 'ngo_id')
@@ -0,0 +1,80 @@
+"""
+Unified login index (Credential) across donors, recipients and NGOs.
+
+Login looks up one indexed table by email, so a client that does not know its
+role no longer needs up to three queries. Rows are kept in sync by the model
+signals below. Bulk paths call ``sync_bulk`` themselves, because ``bulk_create``
+sends no signals.
+"""
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import metrics
+from .models import Credential, Donor, Recipient, NGO
+from .throttling import verify_password
+
+ROLE_MODELS = {'donor': (Donor, 'donor_id'), 'recipient': (Recipient, 'recipient_id'), 'ngo': (NGO, 'ngo_id')}
+MODEL_ROLES = {model: role for role, (model, _) in ROLE_MODELS.items()}
+
+
+def registered_role(email, exclude_role=None):
+    """Return the role an email is already registered under, or None."""
+    existing = Credential.objects.filter(email=email)
+    if exclude_role:
+        existing = existing.exclude(role=exclude_role)
+    return existing.values_list('role', flat=True).first()
+
+
+def authenticate(email, password, role=None):
+    """Return the matching Credential for email/password (optionally within one role), or None."""
+    candidates = Credential.objects.filter(email=email)
+    if role:
+        candidates = candidates.filter(role=role)
+    for credential in candidates:
+        is_correct, must_update = verify_password(password, credential.password)
+        if is_correct:
+            if must_update:
+                upgrade_password(credential, password)
+            return credential
+    return None
+
+
+def upgrade_password(credential, password):
+    """Rehash with the current hasher profile, in both the user's table and the index."""
+    model, pk_name = ROLE_MODELS[credential.role]
+    credential.password = make_password(password)
+    with transaction.atomic():
+        model.objects.filter(**{pk_name: credential.user_id}).update(password=credential.password)
+        Credential.objects.filter(pk=credential.pk).update(password=credential.password)
+    metrics.incr('login.rehashed')
+
+
+def sync_bulk(role, emails):
+    """Create Credential rows for users just inserted with bulk_create (which sends no signals)."""
+    model, pk_name = ROLE_MODELS[role]
+    users = model.objects.filter(email__in=emails).values_list(pk_name, 'email', 'password')
+    Credential.objects.bulk_create(
+        [Credential(role=role, user_id=user_id, email=email, password=password) for user_id, email, password in users],
+        ignore_conflicts=True,
+    )
+
+
+@receiver(post_save, sender=Donor)
+@receiver(post_save, sender=Recipient)
+@receiver(post_save, sender=NGO)
+def _sync_credential(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    role = MODEL_ROLES[sender]
+    fields = {'email': instance.email, 'password': instance.password}
+    if created or not Credential.objects.filter(role=role, user_id=instance.pk).update(**fields):
+        Credential.objects.create(role=role, user_id=instance.pk, **fields)
+
+
+@receiver(post_delete, sender=Donor)
+@receiver(post_delete, sender=Recipient)
+@receiver(post_delete, sender=NGO)
+def _drop_credential(sender, instance, **kwargs):
+    Credential.objects.filter(role=MODEL_ROLES[sender], user_id=instance.pk).delete()
@@ -0,0 +1,91 @@
+"""
+Streaming NDJSON/CSV exports of whole tables.
+
+Rows are read in primary-key ordered batches (``WHERE pk > last LIMIT n``) and
+written to the response as they arrive, so memory stays flat however large the
+table is. MySQL's client library buffers a whole result set even for
+``iterator()``, which is why batches are bounded by keyset rather than relying on
+a server-side cursor.
+"""
+import csv
+import datetime
+import json
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import Donor, Recipient, NGO, Donation
+from .serializers import DonorSerializer, RecipientSerializer, NGOSerializer
+
+FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+# resource -> (model, pk name, exported columns); user exports mirror the API serializers (no passwords)
+RESOURCES = {
+    'donors': (Donor, 'donor_id', DonorSerializer.Meta.fields),
+    'recipients': (Recipient, 'recipient_id', RecipientSerializer.Meta.fields),
+    'ngos': (NGO, 'ngo_id', NGOSerializer.Meta.fields),
+    'donations': (Donation, 'donation_id', [
+        'donation_id', 'title', 'description', 'category', 'quantity',
+        'status', 'image_url', 'created_at', 'donor', 'ngo',
+    ]),
+}
+
+
+def _format_value(value):
+    # Match DRF's DateTimeField output so exports agree with the API
+    if isinstance(value, datetime.datetime):
+        if timezone.is_aware(value):
+            value = timezone.localtime(value)
+        value = value.isoformat()
+        if value.endswith('+00:00'):
+            value = value[:-6] + 'Z'
+    return value
+
+
+def iter_rows(queryset, pk_name, columns, chunk_size=None):
+    """Yield value tuples for ``columns`` in pk order, one bounded batch at a time."""
+    chunk_size = chunk_size or settings.EXPORT_CHUNK_SIZE
+    pk_index = columns.index(pk_name)
+    queryset = queryset.order_by(pk_name).values_list(*columns)
+    last_pk = None
+    while True:
+        batch = queryset if last_pk is None else queryset.filter(**{f'{pk_name}__gt': last_pk})
+        rows = list(batch[:chunk_size])
+        if not rows:
+            return
+        yield from rows
+        if len(rows) < chunk_size:
+            return
+        last_pk = rows[-1][pk_index]
+
+
+class _Echo:
+    """File-like object whose write() hands the line back to the caller (for csv.writer)."""
+
+    def write(self, value):
+        return value
+
+
+def stream_ndjson(rows, columns):
+    for row in rows:
+        record = dict(zip(columns, map(_format_value, row)))
+        yield json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n'
+
+
+def stream_csv(rows, columns):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(columns)
+    for row in rows:
+        yield writer.writerow(['' if value is None else _format_value(value) for value in row])
+
+
+def stream_export(resource, queryset, fmt):
+    """Return a generator of encoded chunks for ``resource`` in ``fmt`` ('ndjson' or 'csv')."""
+    _, pk_name, columns = RESOURCES[resource]
+    rows = iter_rows(queryset, pk_name, list(columns))
+    if fmt == 'csv':
+        return stream_csv(rows, columns)
+    return stream_ndjson(rows, columns)
@@ -0,0 +1,26 @@
+"""
+Password hashers whose work factors come from settings (PBKDF2_ITERATIONS,
+ARGON2_*, SCRYPT_*; 0 keeps Django's default).
+
+Each keeps the algorithm name of the Django hasher it extends, so existing
+hashes still verify. ``must_update`` compares a stored hash with the configured
+parameters, which makes a retuned or switched profile (PASSWORD_HASHER_PROFILE)
+rehash passwords on the next successful login.
+"""
+from django.conf import settings
+from django.contrib.auth.hashers import Argon2PasswordHasher, PBKDF2PasswordHasher, ScryptPasswordHasher
+
+
+class TunedPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    iterations = settings.PBKDF2_ITERATIONS or PBKDF2PasswordHasher.iterations
+
+
+class TunedArgon2PasswordHasher(Argon2PasswordHasher):
+    """Needs argon2-cffi (pip install argon2-cffi)."""
+    time_cost = settings.ARGON2_TIME_COST or Argon2PasswordHasher.time_cost
+    memory_cost = settings.ARGON2_MEMORY_COST or Argon2PasswordHasher.memory_cost
+    parallelism = settings.ARGON2_PARALLELISM or Argon2PasswordHasher.parallelism
+
+
+class TunedScryptPasswordHasher(ScryptPasswordHasher):
+    work_factor = settings.SCRYPT_WORK_FACTOR or ScryptPasswordHasher.work_factor
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from api.allocation import allocate
+
+
+class Command(BaseCommand):
+    help = 'Allocate delivered donations to queued recipients by urgency, family size and wait time'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None,
+                            help='Rows loaded and written per batch (default: ALLOCATION_BATCH_SIZE)')
+        parser.add_argument('--time-budget', type=float, default=None,
+                            help='Stop allocating after this many seconds')
+
+    def handle(self, *args, **options):
+        report = allocate(batch_size=options['batch_size'], time_budget=options['time_budget'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Allocated {report.allocated}/{report.donations_considered} donations "
+            f"from {report.queued_loaded} queued requests in {report.elapsed:.2f}s"
+            + (' (time budget exhausted)' if report.budget_exhausted else '')
+        ))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from api.trends import backfill_buckets
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the DonationBucket trend rollup from all donations, a donation_id range at a time'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=10000, help='Donation ids aggregated per query')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows per bulk INSERT')
+
+    def handle(self, *args, **options):
+        def progress(done, total):
+            if options['verbosity'] > 1:
+                self.stdout.write(f'  aggregated donation ids up to {done} of {total}')
+
+        count = backfill_buckets(chunk_size=options['chunk_size'], batch_size=options['batch_size'], progress=progress)
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {count} donation buckets'))
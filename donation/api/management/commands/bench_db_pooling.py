@@ -0,0 +1,101 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+from django.test import Client
+
+from api.models import Donor
+
+# Extra environment per mode; settings.py turns these into DATABASES options
+MODES = {
+    'per-request': {'MYSQL_CONN_MAX_AGE': '0', 'MYSQL_POOL_SIZE': '0'},
+    'persistent': {'MYSQL_CONN_MAX_AGE': '300', 'MYSQL_POOL_SIZE': '0'},
+    'pool': {'MYSQL_CONN_MAX_AGE': '0'},
+}
+URLS = ['/api/health/', '/donor/']
+
+
+def percentile(sorted_values, fraction):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+class Command(BaseCommand):
+    help = 'Compare p50/p99 latency of /api/health/ and /donor/ with per-request, persistent and pooled DB connections'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500, help='Requests per URL per mode')
+        parser.add_argument('--concurrency', type=int, default=4, help='Client threads')
+        parser.add_argument('--pool-size', type=int, default=4)
+        parser.add_argument('--mode', choices=sorted(MODES), action='append', help='Mode to run (default: all)')
+        parser.add_argument('--donor-id', type=int, help='Donor whose dashboard is requested (default: first donor)')
+        parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+
+    def handle(self, *args, requests, concurrency, pool_size, mode, donor_id, child, **options):
+        if child:
+            self.stdout.write(json.dumps(self._measure(requests, concurrency, donor_id)))
+            return
+        self.stdout.write(f'{requests} requests per URL, {concurrency} threads:')
+        for name in mode or list(MODES):
+            # Database settings are read once at startup, so each mode runs in a fresh process
+            env = {**os.environ, 'MYSQL_POOL_SIZE': str(pool_size), **MODES[name]}
+            argv = [sys.executable, sys.argv[0], 'bench_db_pooling', '--child', '--requests', str(requests),
+                    '--concurrency', str(concurrency)]
+            if donor_id:
+                argv += ['--donor-id', str(donor_id)]
+            result = subprocess.run(argv, env=env, capture_output=True, text=True)
+            if result.returncode:
+                raise CommandError(f'{name} run failed:\n{result.stderr}')
+            for url, r in json.loads(result.stdout.strip().splitlines()[-1]).items():
+                self.stdout.write(
+                    f"  {name:12} {url:14} p50 {r['p50']:7.2f} ms  p99 {r['p99']:7.2f} ms  {r['rps']:8.1f} req/s"
+                )
+
+    def _measure(self, requests, concurrency, donor_id):
+        donor_id = donor_id or Donor.objects.order_by('donor_id').values_list('donor_id', flat=True).first()
+        if donor_id is None:
+            raise CommandError('No donor to request /donor/ for; pass --donor-id or register one')
+        session = SessionStore()
+        session.update({'user_id': donor_id, 'user_type': 'donor'})
+        session.create()
+        close_old_connections()
+
+        results = {}
+        for url in URLS:
+            timings, lock = [], threading.Lock()
+
+            def worker(count):
+                client = Client()
+                client.cookies['sessionid'] = session.session_key
+                local = []
+                for _ in range(count):
+                    started = time.perf_counter()
+                    client.get(url)
+                    # The test client skips the request_finished cleanup a WSGI server triggers
+                    close_old_connections()
+                    local.append((time.perf_counter() - started) * 1000)
+                with lock:
+                    timings.extend(local)
+
+            threads = [threading.Thread(target=worker, args=(requests // concurrency,)) for _ in range(concurrency)]
+            started = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - started
+            timings.sort()
+            results[url] = {
+                'p50': statistics.median(timings),
+                'p99': percentile(timings, 0.99),
+                'rps': len(timings) / elapsed,
+            }
+        session.delete()
+        return results
@@ -0,0 +1,69 @@
+import statistics
+import time
+
+from django.conf import settings
+from django.contrib.auth.hashers import (
+    Argon2PasswordHasher, BCryptSHA256PasswordHasher, PBKDF2PasswordHasher, ScryptPasswordHasher,
+)
+from django.core.management.base import BaseCommand
+from django.utils.module_loading import import_string
+
+BASE_HASHERS = {
+    'pbkdf2': (PBKDF2PasswordHasher, 'iterations'),
+    'argon2': (Argon2PasswordHasher, 'memory_cost'),
+    'scrypt': (ScryptPasswordHasher, 'work_factor'),
+    'bcrypt_sha256': (BCryptSHA256PasswordHasher, 'rounds'),
+}
+
+
+class Command(BaseCommand):
+    help = 'Measure password verify latency per hasher (and work factor) on this machine'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rounds', type=int, default=20, help='Verifications per hasher')
+        parser.add_argument('--hasher', action='append', choices=sorted(BASE_HASHERS),
+                            help='Hasher to measure (repeatable; default: all)')
+        parser.add_argument('--pbkdf2-iterations', type=int, nargs='*', default=[],
+                            help='Extra PBKDF2 iteration counts to try')
+        parser.add_argument('--argon2-memory-cost', type=int, nargs='*', default=[],
+                            help='Extra Argon2 memory costs (KiB) to try')
+        parser.add_argument('--scrypt-work-factor', type=int, nargs='*', default=[],
+                            help='Extra scrypt work factors (powers of two) to try')
+
+    def _candidates(self, names, options):
+        extra = {
+            'pbkdf2': options['pbkdf2_iterations'],
+            'argon2': options['argon2_memory_cost'],
+            'scrypt': options['scrypt_work_factor'],
+        }
+        current = import_string(settings.PASSWORD_HASHERS[0])
+        yield f'{current.algorithm} (profile: {settings.PASSWORD_HASHER_PROFILE})', current
+        for name in names:
+            base, param = BASE_HASHERS[name]
+            yield f'{base.algorithm} {param}={getattr(base, param)}', base
+            for value in extra.get(name, []):
+                yield f'{base.algorithm} {param}={value}', type(base.__name__, (base,), {param: value})
+
+    def handle(self, *args, rounds, hasher, **options):
+        self.stdout.write(f'{rounds} verifications per hasher:')
+        for label, hasher_class in self._candidates(hasher or list(BASE_HASHERS), options):
+            hasher_obj = hasher_class()
+            try:
+                started = time.perf_counter()
+                encoded = hasher_obj.encode('correct horse battery staple', hasher_obj.salt())
+                encode_ms = (time.perf_counter() - started) * 1000
+            except ValueError as exc:
+                # Optional library (argon2-cffi, bcrypt) not installed
+                self.stdout.write(f'  {label:36} skipped: {exc}')
+                continue
+            timings = []
+            for _ in range(rounds):
+                started = time.perf_counter()
+                hasher_obj.verify('correct horse battery staple', encoded)
+                timings.append((time.perf_counter() - started) * 1000)
+            timings.sort()
+            p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+            self.stdout.write(
+                f'  {label:36} encode {encode_ms:8.1f} ms  verify p50 {statistics.median(timings):8.1f} ms  '
+                f'p95 {p95:8.1f} ms  {1000 / statistics.median(timings):7.1f} verifies/s per core'
+            )
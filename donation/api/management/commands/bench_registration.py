@@ -0,0 +1,76 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from api.services import USER_SERIALIZERS, create_user
+
+# Hashing is benchmarked separately (bench_hashers); a cheap hasher keeps the focus on DB writes
+FAST_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+
+class _Rollback(Exception):
+    pass
+
+
+def legacy_create_user(role, data):
+    """The pre-single-write registration path: INSERT, then set_password and a full-row UPDATE."""
+    serializer = USER_SERIALIZERS[role](data=data)
+    serializer.is_valid(raise_exception=True)
+    user = serializer.save()
+    if data.get('password'):
+        user.set_password(data['password'])
+        user.save()
+    return serializer.data
+
+
+class Command(BaseCommand):
+    help = 'Compare write amplification of the legacy and single-write registration paths (rolled back)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=1000, help='Registrations per burst')
+        parser.add_argument('--role', choices=sorted(USER_SERIALIZERS), default='donor')
+
+    def _burst(self, create, role, count, tag):
+        queries, elapsed = [], 0.0
+        try:
+            with transaction.atomic(), CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                for i in range(count):
+                    data = {'name': f'Bench {i}', 'ngo_name': f'Bench {i}', 'email': f'bench-{tag}-{i}@example.com',
+                            'phone': '0000000000', 'city': 'Bench', 'state': 'Bench', 'pincode': '000000',
+                            'password': f'secret-{i}'}
+                    create(role, data)
+                elapsed = time.perf_counter() - started
+                queries = list(captured.captured_queries)
+                raise _Rollback
+        except _Rollback:
+            pass
+        writes = [q['sql'].split(None, 1)[0].upper() for q in queries]
+        return {
+            'inserts': writes.count('INSERT'),
+            'updates': writes.count('UPDATE'),
+            'statements': len(queries),
+            'elapsed': elapsed,
+        }
+
+    def handle(self, *args, count, role, **options):
+        with override_settings(PASSWORD_HASHERS=FAST_HASHERS):
+            results = {
+                'legacy (INSERT + UPDATE)': self._burst(legacy_create_user, role, count, 'legacy'),
+                'single write (INSERT)': self._burst(create_user, role, count, 'single'),
+            }
+        self.stdout.write(f'{count} {role} registrations per burst, rolled back:')
+        for name, r in results.items():
+            per_sec = count / r['elapsed'] if r['elapsed'] else 0
+            self.stdout.write(
+                f"  {name:26} {r['inserts']:6} INSERT {r['updates']:6} UPDATE "
+                f"{r['statements'] / count:5.2f} stmt/registration {r['elapsed']:7.3f}s {per_sec:9.0f}/s"
+            )
+        legacy, single = results.values()
+        saved = legacy['inserts'] + legacy['updates'] - single['inserts'] - single['updates']
+        self.stdout.write(self.style.SUCCESS(
+            f"Single-write path avoids {saved} row writes per {count} registrations "
+            f"({saved / count:.2f} per registration)"
+        ))
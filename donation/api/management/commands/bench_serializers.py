@@ -0,0 +1,106 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import RequestFactory
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+
+from api import fast_serializers
+from api.models import Donor, Recipient, NGO, Donation
+from api.pagination import KeysetPaginator, encode_cursor
+from api.serializers import DonorSerializer, RecipientSerializer, NGOSerializer, DonationSerializer
+
+RESOURCES = {
+    'donors': (Donor, 'donor_id', DonorSerializer, fast_serializers.donors),
+    'recipients': (Recipient, 'recipient_id', RecipientSerializer, fast_serializers.recipients),
+    'ngos': (NGO, 'ngo_id', NGOSerializer, fast_serializers.ngos),
+    'donations': (Donation, 'donation_id', DonationSerializer, fast_serializers.donations),
+}
+
+
+class _Rollback(Exception):
+    pass
+
+
+def seed(rows):
+    Donor.objects.bulk_create([
+        Donor(name=f'Bench dönor {i}', email=f'bench-{i}@bench.test', phone='9800000000', address='1 Bench Road',
+              city='Pune', state='Maharashtra', pincode='411001')
+        for i in range(rows)
+    ], batch_size=1000)
+    Recipient.objects.bulk_create([
+        Recipient(name=f'Bench recipient {i}', email=f'bench-{i}@bench.test', family_size=1 + i % 6,
+                  city='Pune', state='Maharashtra', pincode='411001')
+        for i in range(rows)
+    ], batch_size=1000)
+    NGO.objects.bulk_create([
+        NGO(ngo_name=f'Bench NGO {i}', email=f'bench-{i}@bench.test', phone='1', website='https://ngo.bench.test',
+            city='Pune', state='Maharashtra', pincode='411001')
+        for i in range(rows)
+    ], batch_size=1000)
+    donor_id = Donor.objects.filter(email='bench-0@bench.test').values_list('donor_id', flat=True).get()
+    now = timezone.now()
+    Donation.objects.bulk_create([
+        Donation(donor_id=donor_id, title=f'Bench donation {i}', description='Rice and lentils', category='food',
+                 quantity=1 + i % 9, created_at=now)
+        for i in range(rows)
+    ], batch_size=1000)
+
+
+class Command(BaseCommand):
+    help = 'Compare rows/sec of the DRF serializers and the values_list fast path on list pages (rolled back)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=5000, help='Rows seeded per resource')
+        parser.add_argument('--page-size', type=int, default=500)
+        parser.add_argument('--repeat', type=int, default=5, help='Full passes over the seeded rows per path')
+
+    def _pages(self, request_factory, page_size, model, pk_name, render):
+        """Render every page of the resource; return the list of page bodies."""
+        bodies, cursor = [], None
+        while True:
+            params = {'page_size': page_size}
+            if cursor:
+                params['cursor'] = cursor
+            paginator = KeysetPaginator(Request(request_factory.get('/bench/', params)), pk_name)
+            bodies.append(render(paginator, model.objects.all()))
+            if paginator.next_position is None:
+                return bodies
+            cursor = encode_cursor('n', paginator.next_position)
+
+    def handle(self, *args, rows, page_size, repeat, **options):
+        factory = RequestFactory()
+
+        def drf(serializer_class):
+            def render(paginator, queryset):
+                items = paginator.paginate(queryset)
+                return JSONRenderer().render(paginator.get_paginated_data(serializer_class(items, many=True).data))
+            return render
+
+        def fast(encoder):
+            return encoder.paginate
+
+        self.stdout.write(f'{rows} rows per resource, page size {page_size}, {repeat} passes (rolled back):')
+        try:
+            with transaction.atomic():
+                seed(rows)
+                for name, (model, pk_name, serializer_class, encoder) in RESOURCES.items():
+                    timings = {}
+                    for label, render in (('DRF serializer', drf(serializer_class)), ('fast path', fast(encoder))):
+                        started = time.perf_counter()
+                        for _ in range(repeat):
+                            bodies = self._pages(factory, page_size, model, pk_name, render)
+                        timings[label] = (time.perf_counter() - started, bodies)
+                    total = model.objects.count() * repeat
+                    (slow_time, slow_bodies), (fast_time, fast_bodies) = timings.values()
+                    if slow_bodies != fast_bodies:
+                        raise CommandError(f'{name}: fast path output differs from the DRF serializer')
+                    self.stdout.write(
+                        f'  {name:11} DRF {total / slow_time:10.0f} rows/s   fast {total / fast_time:10.0f} rows/s   '
+                        f'{slow_time / fast_time:5.1f}x  (identical bytes)'
+                    )
+                raise _Rollback
+        except _Rollback:
+            pass
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from api.analytics import rebuild_analytics
+
+
+class Command(BaseCommand):
+    help = 'Recompute the superadmin analytics counters from donations, recipients and NGOs'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows per bulk INSERT')
+
+    def handle(self, *args, **options):
+        count = rebuild_analytics(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {count} analytics counters'))
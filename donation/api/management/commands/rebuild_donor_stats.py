@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from api.stats import rebuild_donor_stats
+
+
+class Command(BaseCommand):
+    help = 'Recompute the DonorStats KPI rollup for every donor from donations and feedback'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows per bulk INSERT')
+
+    def handle(self, *args, **options):
+        count = rebuild_donor_stats(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt KPI rollups for {count} donors'))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from api.ratings import rebuild_ratings
+
+
+class Command(BaseCommand):
+    help = 'Recompute the per-donation and per-NGO rating aggregates from feedback'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows per bulk INSERT')
+
+    def handle(self, *args, **options):
+        count = rebuild_ratings(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {count} rating aggregates'))
@@ -0,0 +1,308 @@
+"""
+Batch donation matching.
+
+All ``pending`` donations are assigned to NGOs in one pass and written back with
+``bulk_update``. Strategies are pluggable:
+
+* ``city_first`` - the first NGO in the donor's city, as ``match_donation`` and the
+  ``SubmitDonation`` stored procedure originally did.
+* ``round_robin`` / ``least_loaded`` - spread a city's donations over all its NGOs.
+* ``min_cost_flow`` - capacity-aware assignment within the donor's city that
+  prefers nearby pincodes.
+"""
+import heapq
+import itertools
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count
+
+from .models import NGO, NGOCapacity, Donation
+from .signals import donations_status_changed
+from . import ngo_index
+
+# Donations in this status count against an NGO's workload
+MATCHED = 'matched'
+PINCODE_DIGITS = 6
+
+
+@dataclass
+class MatchReport:
+    strategy: str
+    considered: int = 0
+    matched: int = 0
+    unmatched: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def matches_per_sec(self):
+        return self.matched / self.elapsed if self.elapsed else 0.0
+
+    def as_dict(self):
+        return {
+            'strategy': self.strategy,
+            'considered': self.considered,
+            'matched': self.matched,
+            'unmatched': self.unmatched,
+            'elapsed_seconds': round(self.elapsed, 4),
+            'matches_per_sec': round(self.matches_per_sec, 1),
+        }
+
+
+class CityIndex:
+    """Mapping of city -> NGO ids (ascending), taken from the cached api.ngo_index."""
+
+    def __init__(self, by_city):
+        self.by_city = by_city
+
+    @classmethod
+    def build(cls):
+        return cls(ngo_index.get_index())
+
+    def ngos_in(self, city):
+        return self.by_city.get(city, [])
+
+
+class CityStrategy:
+    """Base for strategies that pick one NGO per donation from the donor's city."""
+
+    def __init__(self, index):
+        self.index = index
+
+    def choose(self, city):
+        raise NotImplementedError
+
+    def assign(self, rows):
+        for donation_id, city, _pincode, _category in rows:
+            yield donation_id, self.choose(city)
+
+
+class CityFirstStrategy(CityStrategy):
+    """Always the lowest ngo_id in the city, like the SubmitDonation stored procedure."""
+
+    name = 'city_first'
+
+    def choose(self, city):
+        ngo_ids = self.index.ngos_in(city)
+        return ngo_ids[0] if ngo_ids else None
+
+
+class RoundRobinStrategy(CityStrategy):
+    """Cycle through the NGOs of each city in ngo_id order."""
+
+    name = 'round_robin'
+
+    def __init__(self, index):
+        super().__init__(index)
+        self._cycles = {}
+
+    def choose(self, city):
+        if city not in self._cycles:
+            ngo_ids = self.index.ngos_in(city)
+            if not ngo_ids:
+                return None
+            self._cycles[city] = itertools.cycle(ngo_ids)
+        return next(self._cycles[city])
+
+
+class LeastLoadedStrategy(CityStrategy):
+    """Pick the NGO in the city with the fewest matched donations (ties go to the lowest ngo_id)."""
+
+    name = 'least_loaded'
+
+    def __init__(self, index):
+        super().__init__(index)
+        self.loads = dict(
+            Donation.objects.filter(ngo__isnull=False, status=MATCHED)
+            .values_list('ngo').annotate(n=Count('donation_id')).values_list('ngo', 'n')
+        )
+        self._heaps = {}
+
+    def choose(self, city):
+        heap = self._heaps.get(city)
+        if heap is None:
+            heap = [(self.loads.get(ngo_id, 0), ngo_id) for ngo_id in self.index.ngos_in(city)]
+            heapq.heapify(heap)
+            self._heaps[city] = heap
+        if not heap:
+            return None
+        load, ngo_id = heap[0]
+        heapq.heapreplace(heap, (load + 1, ngo_id))
+        return ngo_id
+
+
+def normalize_pincode(pincode):
+    return ''.join(ch for ch in (pincode or '') if ch.isdigit())[:PINCODE_DIGITS]
+
+
+def solve_prefix_transport(supplies, sinks):
+    """Min-cost assignment of donations to NGO capacity under a pincode-prefix distance.
+
+    ``supplies`` is a list of (donation_id, pincode) and ``sinks`` a list of
+    (ngo_id, pincode, capacity). Matching a donation with an NGO costs the number of
+    trailing pincode digits that differ, i.e. their distance in the pincode prefix
+    trie. That cost is a tree metric, and for a tree metric the min-cost flow is found
+    exactly by matching bottom-up: pair everything that can be paired within a
+    prefix, then move only the leftovers (all supply or all capacity) up one level.
+    Runs in O((donations + sinks) * PINCODE_DIGITS) instead of building the dense
+    donations x NGOs bipartite graph. Within a prefix, donations go to the NGO with
+    the most remaining capacity. Yields (donation_id, ngo_id) pairs.
+    """
+    supply_at = defaultdict(lambda: defaultdict(list))  # level -> prefix -> [donation_id]
+    sink_at = defaultdict(lambda: defaultdict(list))    # level -> prefix -> [(-remaining, ngo_id)]
+    for donation_id, pincode in supplies:
+        pincode = normalize_pincode(pincode)
+        supply_at[len(pincode)][pincode].append(donation_id)
+    for ngo_id, pincode, capacity in sinks:
+        if capacity > 0:
+            pincode = normalize_pincode(pincode)
+            sink_at[len(pincode)][pincode].append((-capacity, ngo_id))
+
+    for level in range(PINCODE_DIGITS, -1, -1):
+        supply_level, sink_level = supply_at[level], sink_at[level]
+        for prefix in list(supply_level):
+            heap = sink_level.get(prefix)
+            if not heap:
+                continue
+            heapq.heapify(heap)
+            donations = supply_level[prefix]
+            while donations and heap:
+                remaining, ngo_id = heap[0]
+                yield donations.pop(), ngo_id
+                if remaining == -1:
+                    heapq.heappop(heap)
+                else:
+                    heapq.heapreplace(heap, (remaining + 1, ngo_id))
+        if level == 0:
+            break
+        # Leftovers move up to their parent prefix
+        for prefix, donations in supply_level.items():
+            if donations:
+                supply_at[level - 1][prefix[:-1]].extend(donations)
+        for prefix, heap in sink_level.items():
+            if heap:
+                sink_at[level - 1][prefix[:-1]].extend(heap)
+        del supply_at[level], sink_at[level]
+
+
+class MinCostFlowStrategy:
+    """Assign all pending donations at once, respecting per-NGO category capacity.
+
+    Capacity comes from NGOCapacity rows (MATCH_DEFAULT_NGO_CAPACITY when an NGO has
+    none for a category), minus what the NGO already has matched in that category.
+    Each (category, city) is solved independently with solve_prefix_transport: the
+    pincode metric alone would send a donation with a blank pincode, or one left over
+    at the root prefix, to any NGO in the country. As with the other strategies, a
+    donation whose city has no NGO capacity left stays pending.
+    """
+
+    name = 'min_cost_flow'
+
+    def __init__(self, index):
+        self.index = index
+
+    def _sinks(self, categories):
+        """{(category, city): [(ngo_id, pincode, remaining capacity)]}"""
+        ngos = NGO.objects.values_list('ngo_id', 'city', 'pincode')
+        capacity = {
+            (ngo_id, category): cap
+            for ngo_id, category, cap in NGOCapacity.objects.filter(category__in=categories)
+            .values_list('ngo_id', 'category', 'capacity')
+        }
+        load = {
+            (ngo_id, category): n
+            for ngo_id, category, n in Donation.objects.filter(status=MATCHED, ngo__isnull=False, category__in=categories)
+            .values_list('ngo', 'category').annotate(n=Count('donation_id')).values_list('ngo', 'category', 'n')
+        }
+        default = settings.MATCH_DEFAULT_NGO_CAPACITY
+        sinks = defaultdict(list)
+        for ngo_id, city, pincode in ngos:
+            for category in categories:
+                remaining = capacity.get((ngo_id, category), default) - load.get((ngo_id, category), 0)
+                sinks[(category, city)].append((ngo_id, pincode, remaining))
+        return sinks
+
+    def assign(self, rows):
+        groups = defaultdict(list)
+        for donation_id, city, pincode, category in rows:
+            groups[(category, city)].append((donation_id, pincode))
+        sinks = self._sinks({category for category, _city in groups})
+        for key, supplies in groups.items():
+            matched = dict(solve_prefix_transport(supplies, sinks.get(key, [])))
+            for donation_id, _pincode in supplies:
+                yield donation_id, matched.get(donation_id)
+
+
+STRATEGIES = {
+    strategy.name: strategy
+    for strategy in (CityFirstStrategy, RoundRobinStrategy, LeastLoadedStrategy, MinCostFlowStrategy)
+}
+DEFAULT_STRATEGY = LeastLoadedStrategy.name
+
+
+def _iter_pending(batch_size):
+    """Yield (donation_id, city, pincode, category) for pending donations, in keyset batches."""
+    pending = Donation.objects.filter(status='pending').order_by('donation_id')
+    last_id = 0
+    while True:
+        rows = list(
+            pending.filter(donation_id__gt=last_id)
+            .values_list('donation_id', 'donor__city', 'donor__pincode', 'category')[:batch_size]
+        )
+        if not rows:
+            return
+        yield from rows
+        last_id = rows[-1][0]
+
+
+def _write_matches(updates):
+    with transaction.atomic():
+        Donation.objects.bulk_update(updates, ['ngo', 'status'])
+    donations_status_changed.send(
+        sender=Donation, donation_ids=[d.donation_id for d in updates], old_status='pending', new_status=MATCHED,
+    )
+
+
+def match_pending(strategy=DEFAULT_STRATEGY, batch_size=None):
+    """Assign every pending donation to an NGO and return a MatchReport."""
+    batch_size = batch_size or settings.MATCH_BATCH_SIZE
+    started = time.perf_counter()
+    chooser = STRATEGIES[strategy](CityIndex.build())
+    report = MatchReport(strategy=strategy)
+
+    updates = []
+    for donation_id, ngo_id in chooser.assign(_iter_pending(batch_size)):
+        report.considered += 1
+        if ngo_id is None:
+            report.unmatched += 1
+            continue
+        updates.append(Donation(donation_id=donation_id, ngo_id=ngo_id, status=MATCHED))
+        if len(updates) >= batch_size:
+            _write_matches(updates)
+            report.matched += len(updates)
+            updates = []
+    if updates:
+        _write_matches(updates)
+        report.matched += len(updates)
+
+    report.elapsed = time.perf_counter() - started
+    return report
+
+
+def match_one(donation):
+    """Match a single donation to the least-loaded NGO in its donor's city; return the ngo_id or None."""
+    ngo_ids = ngo_index.ngos_in(donation.donor.city)
+    if not ngo_ids:
+        return None
+    loads = dict(
+        Donation.objects.filter(ngo_id__in=ngo_ids, status=MATCHED)
+        .values_list('ngo').annotate(n=Count('donation_id')).values_list('ngo', 'n')
+    )
+    ngo_id = min(ngo_ids, key=lambda candidate: (loads.get(candidate, 0), candidate))
+    donation.ngo_id = ngo_id
+    donation.status = MATCHED
+    donation.save()
+    return ngo_id
@@ -0,0 +1,26 @@
+"""
+Process-local counters for cache hit rates, throttling and similar operational metrics.
+
+Counters live in this worker process only; ``/api/metrics/`` reports the worker
+that served the request.
+"""
+import threading
+from collections import Counter
+
+_counters = Counter()
+_lock = threading.Lock()
+
+
+def incr(name, amount=1):
+    with _lock:
+        _counters[name] += amount
+
+
+def snapshot(prefix=''):
+    with _lock:
+        return {name: value for name, value in sorted(_counters.items()) if name.startswith(prefix)}
+
+
+def reset():
+    with _lock:
+        _counters.clear()
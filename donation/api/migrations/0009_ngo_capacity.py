@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:33
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_add_submit_donation_procedure'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NGOCapacity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('category', models.CharField(max_length=50)),
+                ('capacity', models.PositiveIntegerField(default=0)),
+                ('ngo', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='capacities', to='api.ngo')),
+            ],
+            options={
+                'unique_together': {('ngo', 'category')},
+            },
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:34
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_ngo_capacity'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AllocationRequest',
+            fields=[
+                ('request_id', models.AutoField(primary_key=True, serialize=False)),
+                ('category', models.CharField(max_length=50)),
+                ('status', models.CharField(default='queued', max_length=20)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('recipient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='allocation_requests', to='api.recipient')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Match',
+            fields=[
+                ('donation', models.OneToOneField(db_column='match_id', on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='match', serialize=False, to='api.donation')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('recipient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='matches', to='api.recipient')),
+                ('request', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='match', to='api.allocationrequest')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='allocationrequest',
+            index=models.Index(fields=['status', 'category'], name='api_allocat_status_12fd29_idx'),
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:35
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import Coalesce
+
+
+def backfill_donor_stats(apps, schema_editor):
+    Donation = apps.get_model('api', 'Donation')
+    DonorStats = apps.get_model('api', 'DonorStats')
+    totals = Donation.objects.values('donor_id').annotate(
+        total_donations=Count('donation_id'),
+        total_items=Coalesce(Sum('quantity'), 0),
+        delivered_count=Count('donation_id', filter=Q(status__in=['delivered', 'allocated'])),
+        pending_count=Count('donation_id', filter=Q(status='pending')),
+    )
+    stats = {row.pop('donor_id'): DonorStats(**row) for row in totals}
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT d.donor_id, SUM(f.rating), COUNT(*) "
+            "FROM api_feedback f JOIN api_donation d ON d.donation_id = f.match_id "
+            "GROUP BY d.donor_id"
+        )
+        for donor_id, rating_sum, rating_count in cursor.fetchall():
+            row = stats.setdefault(donor_id, DonorStats())
+            row.rating_sum, row.rating_count = rating_sum or 0, rating_count
+    for donor_id, row in stats.items():
+        row.donor_id = donor_id
+    DonorStats.objects.bulk_create(stats.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_allocation_queue'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DonorStats',
+            fields=[
+                ('donor', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='api.donor')),
+                ('total_donations', models.IntegerField(default=0)),
+                ('total_items', models.IntegerField(default=0)),
+                ('delivered_count', models.IntegerField(default=0)),
+                ('pending_count', models.IntegerField(default=0)),
+                ('rating_sum', models.IntegerField(default=0)),
+                ('rating_count', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(backfill_donor_stats, migrations.RunPython.noop),
+    ]
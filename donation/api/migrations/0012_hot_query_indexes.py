@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_donor_stats'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='donation',
+            index=models.Index(fields=['donor', 'status', 'quantity'], name='donation_donor_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='donation',
+            index=models.Index(fields=['status', 'created_at'], name='donation_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='donation',
+            index=models.Index(fields=['created_at'], name='donation_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ngo',
+            index=models.Index(fields=['city'], name='ngo_city_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recipient',
+            index=models.Index(fields=['city'], name='recipient_city_idx'),
+        ),
+    ]
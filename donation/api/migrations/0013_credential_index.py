@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:41
+
+from django.db import migrations, models
+
+
+def backfill_credentials(apps, schema_editor):
+    Credential = apps.get_model('api', 'Credential')
+    for role, model_name, pk_name in [('donor', 'Donor', 'donor_id'),
+                                      ('recipient', 'Recipient', 'recipient_id'),
+                                      ('ngo', 'NGO', 'ngo_id')]:
+        users = apps.get_model('api', model_name).objects.values_list(pk_name, 'email', 'password')
+        Credential.objects.bulk_create(
+            [Credential(role=role, user_id=user_id, email=email, password=password) for user_id, email, password in users],
+            batch_size=1000,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Credential',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('email', models.EmailField(max_length=254)),
+                ('role', models.CharField(max_length=20)),
+                ('user_id', models.IntegerField()),
+                ('password', models.CharField(default='', max_length=128)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('role', 'user_id'), name='credential_role_user_uniq'), models.UniqueConstraint(fields=('email', 'role'), name='credential_email_role_uniq')],
+            },
+        ),
+        migrations.RunPython(backfill_credentials, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0013_credential_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='donor',
+            index=models.Index(fields=['city'], name='donor_city_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='donation',
+            index=models.Index(fields=['category', 'created_at'], name='donation_category_created_idx'),
+        ),
+    ]
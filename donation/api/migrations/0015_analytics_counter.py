@@ -0,0 +1,54 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:20
+
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+
+
+def backfill_analytics(apps, schema_editor):
+    AnalyticsCounter = apps.get_model('api', 'AnalyticsCounter')
+    Donation = apps.get_model('api', 'Donation')
+    NGO = apps.get_model('api', 'NGO')
+    Recipient = apps.get_model('api', 'Recipient')
+
+    def grouped(queryset, field):
+        return queryset.values_list(field).annotate(n=Count('pk')).values_list(field, 'n')
+
+    rows = [('donations', '', Donation.objects.count()), ('ngos', '', NGO.objects.count())]
+    rows += [('donations_by_status', status, n) for status, n in grouped(Donation.objects.all(), 'status')]
+    rows += [('donations_by_category', category, n) for category, n in grouped(Donation.objects.all(), 'category')]
+    rows += [
+        ('donations_by_day', day.isoformat(), n)
+        for day, n in grouped(Donation.objects.annotate(day=TruncDate('created_at')), 'day')
+    ]
+    handled = Donation.objects.filter(ngo__isnull=False).exclude(status='pending')
+    rows += [('ngo_handled', str(ngo_id), n) for ngo_id, n in grouped(handled, 'ngo_id')]
+    rows += [('recipients_by_city', city, n) for city, n in grouped(Recipient.objects.all(), 'city')]
+    AnalyticsCounter.objects.bulk_create(
+        [AnalyticsCounter(metric=metric, key=key, value=value) for metric, key, value in rows],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0014_donation_list_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AnalyticsCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('metric', models.CharField(max_length=40)),
+                ('key', models.CharField(blank=True, max_length=100)),
+                ('value', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['metric', 'value'], name='analytics_metric_value_idx')],
+                'unique_together': {('metric', 'key')},
+            },
+        ),
+        migrations.RunPython(backfill_analytics, migrations.RunPython.noop),
+    ]
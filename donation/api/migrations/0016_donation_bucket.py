@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0015_analytics_counter'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DonationBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('granularity', models.CharField(max_length=5)),
+                ('bucket_start', models.DateField()),
+                ('city', models.CharField(blank=True, max_length=100)),
+                ('category', models.CharField(max_length=50)),
+                ('status', models.CharField(max_length=30)),
+                ('count', models.IntegerField(default=0)),
+                ('items', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['granularity', 'city', 'bucket_start'], name='bucket_city_start_idx')],
+                'unique_together': {('granularity', 'bucket_start', 'city', 'category', 'status')},
+            },
+        ),
+    ]
@@ -0,0 +1,82 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:05
+
+from collections import Counter, defaultdict
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def bayesian(rating_sum, rating_count):
+    weight = settings.RATING_PRIOR_WEIGHT
+    return (weight * settings.RATING_PRIOR_MEAN + rating_sum) / (weight + rating_count)
+
+
+def backfill_ratings(apps, schema_editor):
+    DonationRating = apps.get_model('api', 'DonationRating')
+    NGORating = apps.get_model('api', 'NGORating')
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT d.donation_id, d.ngo_id, COUNT(*), SUM(f.rating) "
+            "FROM api_feedback f JOIN api_donation d ON d.donation_id = f.match_id "
+            "GROUP BY d.donation_id, d.ngo_id"
+        )
+        rows = cursor.fetchall()
+    ngos = defaultdict(Counter)
+    for _, ngo_id, count, total in rows:
+        if ngo_id is not None:
+            ngos[ngo_id].update({'rating_count': count, 'rating_sum': total})
+    DonationRating.objects.bulk_create(
+        [DonationRating(donation_id=donation_id, rating_count=count, rating_sum=total,
+                        bayesian_rating=bayesian(total, count))
+         for donation_id, _, count, total in rows],
+        batch_size=1000,
+    )
+    NGORating.objects.bulk_create(
+        [NGORating(ngo_id=ngo_id, bayesian_rating=bayesian(totals['rating_sum'], totals['rating_count']), **totals)
+         for ngo_id, totals in ngos.items()],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0016_donation_bucket'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='feedback',
+            index=models.Index(fields=['match_id', 'user_id'], name='feedback_match_user_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='feedback',
+            index=models.Index(fields=['user_id'], name='feedback_user_idx'),
+        ),
+        migrations.CreateModel(
+            name='DonationRating',
+            fields=[
+                ('rating_count', models.IntegerField(default=0)),
+                ('rating_sum', models.IntegerField(default=0)),
+                ('bayesian_rating', models.FloatField(default=0)),
+                ('donation', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='rating', serialize=False, to='api.donation')),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='NGORating',
+            fields=[
+                ('rating_count', models.IntegerField(default=0)),
+                ('rating_sum', models.IntegerField(default=0)),
+                ('bayesian_rating', models.FloatField(default=0)),
+                ('ngo', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='rating', serialize=False, to='api.ngo')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['-bayesian_rating', 'ngo'], name='ngorating_leaderboard_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_ratings, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:05
+
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, ExpressionWrapper, F, FloatField, Min
+
+
+def bayesian(rating_sum, rating_count):
+    weight = settings.RATING_PRIOR_WEIGHT
+    return (weight * settings.RATING_PRIOR_MEAN + rating_sum) / (weight + rating_count)
+
+
+def dedupe_feedback(apps, schema_editor):
+    """Keep each user's first feedback per donation and take the repeats off the rollups."""
+    Feedback = apps.get_model('api', 'Feedback')
+    Donation = apps.get_model('api', 'Donation')
+    DonationRating = apps.get_model('api', 'DonationRating')
+    NGORating = apps.get_model('api', 'NGORating')
+    DonorStats = apps.get_model('api', 'DonorStats')
+    repeats = (
+        Feedback.objects.filter(match_id__isnull=False).values('match_id', 'user_id')
+        .annotate(n=Count('feedback_id'), first=Min('feedback_id')).filter(n__gt=1)
+    )
+    removed = defaultdict(Counter)
+    for row in list(repeats):
+        extra = Feedback.objects.filter(match_id=row['match_id'], user_id=row['user_id']).exclude(feedback_id=row['first'])
+        ratings = list(extra.values_list('rating', flat=True))
+        extra.delete()
+        removed[row['match_id']].update({'rating_count': len(ratings), 'rating_sum': sum(ratings)})
+
+    donations = Donation.objects.filter(donation_id__in=list(removed)).values_list('donation_id', 'ngo_id', 'donor_id')
+    for donation_id, ngo_id, donor_id in donations:
+        updates = {
+            'rating_count': F('rating_count') - removed[donation_id]['rating_count'],
+            'rating_sum': F('rating_sum') - removed[donation_id]['rating_sum'],
+        }
+        DonorStats.objects.filter(donor_id=donor_id).update(**updates)
+        for model, key in ((DonationRating, {'donation_id': donation_id}), (NGORating, {'ngo_id': ngo_id})):
+            model.objects.filter(**key).update(**updates)
+            model.objects.filter(**key).update(bayesian_rating=ExpressionWrapper(
+                bayesian(F('rating_sum'), F('rating_count')), output_field=FloatField(),
+            ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0018_donation_status_category_id_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(dedupe_feedback, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='feedback',
+            constraint=models.UniqueConstraint(fields=('match_id', 'user_id'), name='feedback_match_user_uniq'),
+        ),
+        migrations.RemoveIndex(
+            model_name='feedback',
+            name='feedback_match_user_idx',
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:30
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0019_feedback_match_user_unique'),
+    ]
+
+    operations = [
+        migrations.RenameIndex(
+            model_name='allocationrequest',
+            new_name='allocation_status_category_idx',
+            old_name='api_allocat_status_12fd29_idx',
+        ),
+    ]
@@ -14,6 +14,12 @@ class NGO(models.Model):
     pincode = models.CharField(max_length=12)
     password = models.CharField(max_length=128, default='')  # For storing hashed passwords
 
+    class Meta:
+        indexes = [
+            # City matching (match_donation, create_donation auto-assignment)
+            models.Index(fields=['city'], name='ngo_city_idx'),
+        ]
+
     def set_password(self, raw_password):
         self.password = make_password(raw_password)
 
@@ -24,6 +30,19 @@ class NGO(models.Model):
         return self.ngo_name
 
 
+class NGOCapacity(models.Model):
+    """How many open (matched) donations of a category an NGO can take on at once."""
+    ngo = models.ForeignKey(NGO, on_delete=models.CASCADE, related_name='capacities')
+    category = models.CharField(max_length=50)
+    capacity = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = [('ngo', 'category')]
+
+    def __str__(self) -> str:
+        return f"{self.ngo_id}:{self.category}={self.capacity}"
+
+
 class Donor(models.Model):
     donor_id = models.AutoField(primary_key=True)
     name = models.CharField(max_length=150)
@@ -35,6 +54,12 @@ class Donor(models.Model):
     pincode = models.CharField(max_length=12, blank=True)
     password = models.CharField(max_length=128, default='')  # For storing hashed passwords
 
+    class Meta:
+        indexes = [
+            # ?city= on the donation list joins donors by city
+            models.Index(fields=['city'], name='donor_city_idx'),
+        ]
+
     def set_password(self, raw_password):
         self.password = make_password(raw_password)
 
@@ -58,6 +83,12 @@ class Recipient(models.Model):
     pincode = models.CharField(max_length=12, blank=True)
     password = models.CharField(max_length=128, default='')  # For storing hashed passwords
 
+    class Meta:
+        indexes = [
+            # Allocation lookups by recipient city; covers the analytics rebuild GROUP BY city
+            models.Index(fields=['city'], name='recipient_city_idx'),
+        ]
+
     def set_password(self, raw_password):
         self.password = make_password(raw_password)
 
@@ -68,6 +99,21 @@ class Recipient(models.Model):
         return self.name
 
 
+class Credential(models.Model):
+    """Login index across roles: email -> (role, user id, password hash), kept in sync by api.credentials."""
+    email = models.EmailField()
+    role = models.CharField(max_length=20)
+    user_id = models.IntegerField()
+    password = models.CharField(max_length=128, default='')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['role', 'user_id'], name='credential_role_user_uniq'),
+            # Also serves login lookups by email alone (leading column)
+            models.UniqueConstraint(fields=['email', 'role'], name='credential_email_role_uniq'),
+        ]
+
+
 class Donation(models.Model):
     donation_id = models.AutoField(primary_key=True)
     donor = models.ForeignKey(Donor, on_delete=models.CASCADE)
@@ -80,6 +126,99 @@ class Donation(models.Model):
     image_url = models.URLField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Covers the per-donor KPI aggregate (COUNT/SUM(quantity)/status) without touching rows
+            models.Index(fields=['donor', 'status', 'quantity'], name='donation_donor_status_idx'),
+            # Status filters (matching, allocation) ordered by recency
+            models.Index(fields=['status', 'created_at'], name='donation_status_created_idx'),
+            models.Index(fields=['created_at'], name='donation_created_idx'),
+            # ?category= on the donation list, in created_at order
+            models.Index(fields=['category', 'created_at'], name='donation_category_created_idx'),
+            # ?status= / ?category= on the donation list in the default donation_id order
+            models.Index(fields=['status', 'donation_id'], name='donation_status_id_idx'),
+            models.Index(fields=['category', 'donation_id'], name='donation_category_id_idx'),
+        ]
+
+
+class DonorStats(models.Model):
+    """Per-donor KPI rollup, kept current incrementally by api.stats."""
+    donor = models.OneToOneField(Donor, primary_key=True, on_delete=models.CASCADE, related_name='stats')
+    total_donations = models.IntegerField(default=0)
+    total_items = models.IntegerField(default=0)
+    delivered_count = models.IntegerField(default=0)
+    pending_count = models.IntegerField(default=0)
+    rating_sum = models.IntegerField(default=0)
+    rating_count = models.IntegerField(default=0)
+
+    @property
+    def avg_rating(self):
+        return self.rating_sum / self.rating_count if self.rating_count else None
+
+
+class AnalyticsCounter(models.Model):
+    """One precomputed admin metric value (e.g. donations with status=pending), kept current by api.analytics."""
+    metric = models.CharField(max_length=40)
+    key = models.CharField(max_length=100, blank=True)
+    value = models.BigIntegerField(default=0)
+
+    class Meta:
+        unique_together = [('metric', 'key')]
+        indexes = [
+            # Top-k of a metric (recipient cities) read in value order
+            models.Index(fields=['metric', 'value'], name='analytics_metric_value_idx'),
+        ]
+
+
+class DonationBucket(models.Model):
+    """Donations and items per time bucket, donor city, category and status; kept current by api.trends."""
+    granularity = models.CharField(max_length=5)  # day, week or month
+    bucket_start = models.DateField()
+    city = models.CharField(max_length=100, blank=True)
+    category = models.CharField(max_length=50)
+    status = models.CharField(max_length=30)
+    count = models.IntegerField(default=0)
+    items = models.BigIntegerField(default=0)
+
+    class Meta:
+        # Also the index for a time range over all cities
+        unique_together = [('granularity', 'bucket_start', 'city', 'category', 'status')]
+        indexes = [
+            # A city's series
+            models.Index(fields=['granularity', 'city', 'bucket_start'], name='bucket_city_start_idx'),
+        ]
+
+
+class AllocationRequest(models.Model):
+    """A recipient waiting in the allocation queue for a donation of some category."""
+    request_id = models.AutoField(primary_key=True)
+    recipient = models.ForeignKey(Recipient, on_delete=models.CASCADE, related_name='allocation_requests')
+    category = models.CharField(max_length=50)
+    status = models.CharField(max_length=20, default='queued')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # Queue load: queued requests of the categories being allocated
+            models.Index(fields=['status', 'category'], name='allocation_status_category_idx'),
+        ]
+
+
+class Match(models.Model):
+    """A donation allocated to a recipient.
+
+    Keyed by the donation (a donation is allocated once), so ``match_id`` equals the
+    donation id that ``Feedback.match_id`` already refers to.
+    """
+    donation = models.OneToOneField(Donation, primary_key=True, db_column='match_id', on_delete=models.CASCADE, related_name='match')
+    recipient = models.ForeignKey(Recipient, on_delete=models.CASCADE, related_name='matches')
+    request = models.OneToOneField(AllocationRequest, null=True, blank=True, on_delete=models.SET_NULL, related_name='match')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    @property
+    def match_id(self):
+        return self.pk
+
 
 class Feedback(models.Model):
     feedback_id = models.AutoField(primary_key=True)
@@ -87,4 +226,43 @@ class Feedback(models.Model):
     match_id = models.IntegerField(null=True, blank=True)
     rating = models.IntegerField()
     comment = models.TextField(blank=True)
-    created_at = models.DateTimeField(auto_now_add=True)
\ No newline at end of file
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            # A user rates a donation once; also the index rollup rebuilds join on (match_id)
+            models.UniqueConstraint(fields=['match_id', 'user_id'], name='feedback_match_user_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['user_id'], name='feedback_user_idx'),
+        ]
+
+
+class RatingTotals(models.Model):
+    """Running feedback count, sum and Bayesian average, kept current by api.ratings."""
+    rating_count = models.IntegerField(default=0)
+    rating_sum = models.IntegerField(default=0)
+    # Mean pulled towards RATING_PRIOR_MEAN by RATING_PRIOR_WEIGHT virtual ratings
+    bayesian_rating = models.FloatField(default=0)
+
+    class Meta:
+        abstract = True
+
+    @property
+    def avg_rating(self):
+        return self.rating_sum / self.rating_count if self.rating_count else None
+
+
+class DonationRating(RatingTotals):
+    donation = models.OneToOneField(Donation, primary_key=True, on_delete=models.CASCADE, related_name='rating')
+
+
+class NGORating(RatingTotals):
+    """Ratings of all donations handled by an NGO; read by the leaderboard."""
+    ngo = models.OneToOneField(NGO, primary_key=True, on_delete=models.CASCADE, related_name='rating')
+
+    class Meta:
+        indexes = [
+            # Leaderboard order
+            models.Index(fields=['-bayesian_rating', 'ngo'], name='ngorating_leaderboard_idx'),
+        ]
\ No newline at end of file
@@ -0,0 +1,81 @@
+"""
+Cached city -> NGO ids index used for donation auto-assignment and matching.
+
+Two tiers: a process-local copy, and a shared copy in the Django cache so that
+workers do not each rebuild it from the database. A version token in the cache
+is replaced whenever an NGO is saved or deleted. Each worker compares that token
+with its local copy's version, so invalidation reaches every process that shares
+the cache.
+"""
+import uuid
+from collections import defaultdict
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import metrics
+from .models import NGO
+
+VERSION_KEY = 'ngo_city_index:version'
+DATA_KEY = 'ngo_city_index:data:{}'
+
+_local = {'version': None, 'index': None}
+
+
+def _build():
+    by_city = defaultdict(list)
+    for ngo_id, city in NGO.objects.order_by('ngo_id').values_list('ngo_id', 'city'):
+        by_city[city].append(ngo_id)
+    return dict(by_city)
+
+
+def get_index():
+    """Return the {city: [ngo_id, ...]} mapping, NGO ids in ascending order."""
+    version = cache.get(VERSION_KEY)
+    if version is not None and version == _local['version']:
+        metrics.incr('ngo_index.local_hits')
+        return _local['index']
+    index = cache.get(DATA_KEY.format(version)) if version is not None else None
+    if index is not None:
+        metrics.incr('ngo_index.shared_hits')
+    else:
+        metrics.incr('ngo_index.misses')
+        index = _build()
+        if version is None:
+            version = uuid.uuid4().hex
+            cache.set(VERSION_KEY, version, None)
+        cache.set(DATA_KEY.format(version), index, None)
+    _local.update(version=version, index=index)
+    return index
+
+
+def ngos_in(city):
+    return get_index().get(city, [])
+
+
+def first_ngo_in(city):
+    """The NGO the original auto-assignment picked: lowest ngo_id in the city, or None."""
+    ngo_ids = ngos_in(city)
+    return ngo_ids[0] if ngo_ids else None
+
+
+def invalidate():
+    old_version = cache.get(VERSION_KEY)
+    cache.set(VERSION_KEY, uuid.uuid4().hex, None)
+    if old_version is not None:
+        cache.delete(DATA_KEY.format(old_version))
+    _local.update(version=None, index=None)
+    metrics.incr('ngo_index.invalidations')
+
+
+def stats():
+    return metrics.snapshot('ngo_index.')
+
+
+@receiver(post_save, sender=NGO)
+@receiver(post_delete, sender=NGO)
+def _invalidate_on_change(sender, **kwargs):
+    # After commit, so no worker can rebuild from the pre-change rows under the new version
+    transaction.on_commit(invalidate)
@@ -0,0 +1,142 @@
+"""
+Keyset (cursor) pagination for the list endpoints.
+
+Pages are fetched with ``WHERE pk > <last seen pk> ORDER BY pk LIMIT n`` instead of
+OFFSET, so a deep page costs the same as the first one. Lists ordered by another
+column use the (column, pk) pair as the key, so ties never skip or repeat rows.
+Cursors are opaque base64 tokens so clients cannot depend on their contents.
+"""
+import base64
+import datetime
+import json
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.utils.urls import replace_query_param
+
+CURSOR_PARAM = 'cursor'
+PAGE_SIZE_PARAM = 'page_size'
+
+
+def encode_cursor(direction, position):
+    raw = json.dumps([direction, position], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        direction, position = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (TypeError, ValueError):
+        raise NotFound('Invalid cursor')
+    if direction not in ('n', 'p'):
+        raise NotFound('Invalid cursor')
+    # A pk, or [ordering value, pk] for lists ordered by another column
+    if isinstance(position, list) and len(position) == 2 and isinstance(position[1], int):
+        return direction, position
+    if not isinstance(position, int):
+        raise NotFound('Invalid cursor')
+    return direction, position
+
+
+class KeysetPaginator:
+    """Paginate a queryset on its auto primary key using opaque cursors.
+
+    ``ordering`` (e.g. ``'-created_at'``) orders by another column first; the
+    caller is responsible for it being indexed.
+    """
+
+    def __init__(self, request, pk_name, ordering=None):
+        self.request = request
+        # DRF Request, or a plain HttpRequest from the async views
+        self.params = getattr(request, 'query_params', request.GET)
+        self.pk_name = pk_name
+        ordering = ordering or pk_name
+        self.descending = ordering.startswith('-')
+        self.order_field = ordering.lstrip('-')
+        # Values a cursor is made of, in ORDER BY order
+        self.key_fields = [pk_name] if self.order_field == pk_name else [self.order_field, pk_name]
+        self.page_size = self._get_page_size()
+        token = self.params.get(CURSOR_PARAM)
+        self.direction, self.position = decode_cursor(token) if token else ('n', None)
+        if self.position is not None and isinstance(self.position, list) != (len(self.key_fields) == 2):
+            raise NotFound('Invalid cursor')
+        self.next_position = None
+        self.previous_position = None
+
+    def _get_page_size(self):
+        default = settings.API_PAGE_SIZE
+        try:
+            size = int(self.params.get(PAGE_SIZE_PARAM, default))
+        except ValueError:
+            size = default
+        return max(1, min(size, settings.API_MAX_PAGE_SIZE))
+
+    def page_queryset(self, queryset):
+        """Return the lazily evaluated slice for the requested page (one extra row to detect more)."""
+        # Walking backwards flips both the comparison and the sort
+        forward = (self.direction == 'n') != self.descending
+        if self.position is not None:
+            queryset = queryset.filter(self._after(queryset.model, 'gt' if forward else 'lt'))
+        prefix = '' if forward else '-'
+        return queryset.order_by(*[prefix + name for name in self.key_fields])[:self.page_size + 1]
+
+    def _after(self, model, lookup):
+        if len(self.key_fields) == 1:
+            return Q(**{f'{self.pk_name}__{lookup}': self.position})
+        raw, pk = self.position
+        try:
+            value = model._meta.get_field(self.order_field).to_python(raw)
+        except ValidationError:
+            raise NotFound('Invalid cursor')
+        return (Q(**{f'{self.order_field}__{lookup}': value})
+                | Q(**{self.order_field: value, f'{self.pk_name}__{lookup}': pk}))
+
+    def position_of(self, values):
+        """Cursor position for a row's ``key_fields`` values."""
+        if len(values) == 1:
+            return values[0]
+        value, pk = values
+        return [value.isoformat() if isinstance(value, (datetime.date, datetime.time)) else value, pk]
+
+    def finalize(self, rows, key=None):
+        """Trim the extra row, restore the requested order and record the neighbouring cursors."""
+        key = key or (lambda row: self.position_of([getattr(row, name) for name in self.key_fields]))
+        rows = list(rows)
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if self.direction == 'p':
+            rows.reverse()
+            has_next, has_previous = self.position is not None, has_more
+        else:
+            has_next, has_previous = has_more, self.position is not None
+        if rows:
+            if has_next:
+                self.next_position = key(rows[-1])
+            if has_previous:
+                self.previous_position = key(rows[0])
+        return rows
+
+    def paginate(self, queryset):
+        return self.finalize(self.page_queryset(queryset))
+
+    def _link(self, direction, position):
+        if position is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, CURSOR_PARAM, encode_cursor(direction, position))
+
+    def get_next_link(self):
+        return self._link('n', self.next_position)
+
+    def get_previous_link(self):
+        return self._link('p', self.previous_position)
+
+    def get_paginated_data(self, results):
+        return {
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': results,
+        }
@@ -0,0 +1,29 @@
+import json
+
+from django.conf import settings
+from rest_framework.parsers import BaseParser
+
+
+class InvalidLine:
+    """Placeholder for an NDJSON line that is not valid JSON, so one bad line fails only itself."""
+
+    def __init__(self, message):
+        self.message = message
+
+
+class NDJSONParser(BaseParser):
+    """Parse newline-delimited JSON into a list; blank lines are skipped."""
+
+    media_type = 'application/x-ndjson'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get('encoding', settings.DEFAULT_CHARSET)
+        items = []
+        for line in stream.read().decode(encoding).splitlines():
+            if not line.strip():
+                continue
+            try:
+                items.append(json.loads(line))
+            except ValueError as exc:
+                items.append(InvalidLine(f'Invalid JSON: {exc}'))
+        return items
@@ -0,0 +1,153 @@
+"""
+Running feedback aggregates per donation (DonationRating) and per NGO (NGORating).
+
+Each batch of new feedback adds its rating count and sum to the rated
+donation's row and to the row of the NGO that handled it, with ``F()`` deltas;
+deleted feedback, and the feedback of a deleted donation, is taken off again.
+The Bayesian average is updated in the same statement and indexed, so the NGO
+leaderboard is an index walk that never reads api_feedback.
+``rebuild_ratings()`` recomputes both tables from scratch; run it after
+changing RATING_PRIOR_MEAN or RATING_PRIOR_WEIGHT.
+"""
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count, ExpressionWrapper, F, FloatField, Sum
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from .models import Donation, DonationRating, Feedback, NGO, NGORating
+from .rollups import add_or_create
+from .signals import feedback_created
+
+RATING_MIN, RATING_MAX = 1, 5
+
+
+def bayesian(rating_sum, rating_count):
+    """Bayesian average of numbers, or the SQL expression for it given expressions."""
+    weight = settings.RATING_PRIOR_WEIGHT
+    return (weight * settings.RATING_PRIOR_MEAN + rating_sum) / (weight + rating_count)
+
+
+def _apply(model, key_field, totals, create=True):
+    """Add {key: Counter(rating_count=, rating_sum=)} to ``model`` rows, creating missing ones if allowed."""
+    for key, delta in totals.items():
+        count, total = delta['rating_count'], delta['rating_sum']
+        # bayesian_rating is assigned first: MySQL evaluates SET left to right and sees
+        # the columns already updated, standard SQL sees the old values; first, both do
+        updates = {
+            'bayesian_rating': ExpressionWrapper(
+                bayesian(F('rating_sum') + total, F('rating_count') + count), output_field=FloatField(),
+            ),
+            'rating_count': F('rating_count') + count,
+            'rating_sum': F('rating_sum') + total,
+        }
+        if not create:
+            # A removal: drop rows left without ratings, as rebuild_ratings() would
+            add_or_create(model, {key_field: key}, updates)
+            model.objects.filter(**{key_field: key}, rating_count__lte=0).delete()
+            continue
+        add_or_create(model, {key_field: key}, updates, {
+            'rating_count': count, 'rating_sum': total, 'bayesian_rating': bayesian(total, count),
+        })
+
+
+def record_feedback(feedbacks, sign=1):
+    """Add feedback ratings to the rated donations' and their NGOs' aggregates (``sign=-1`` removes them)."""
+    by_donation = defaultdict(Counter)
+    for feedback in feedbacks:
+        if feedback.match_id is not None:
+            by_donation[feedback.match_id].update({'rating_count': sign, 'rating_sum': sign * feedback.rating})
+    # Feedback for a donation that no longer exists has nothing to attach to
+    ngos = dict(Donation.objects.filter(donation_id__in=list(by_donation)).values_list('donation_id', 'ngo_id'))
+    by_donation = {donation_id: delta for donation_id, delta in by_donation.items() if donation_id in ngos}
+    by_ngo = defaultdict(Counter)
+    for donation_id, delta in by_donation.items():
+        if ngos[donation_id] is not None:
+            by_ngo[ngos[donation_id]].update(delta)
+    # Removals never create rows: there is nothing to take the ratings off
+    _apply(DonationRating, 'donation_id', by_donation, create=sign > 0)
+    _apply(NGORating, 'ngo_id', by_ngo, create=sign > 0)
+
+
+@receiver(feedback_created)
+def _on_feedback_created(sender, feedbacks, **kwargs):
+    record_feedback(feedbacks)
+
+
+@receiver(post_delete, sender=Feedback)
+def _on_feedback_deleted(sender, instance, **kwargs):
+    record_feedback([instance], sign=-1)
+
+
+def donation_feedback_totals(donation_id):
+    """Counter(rating_count=, rating_sum=) of the feedback on one donation."""
+    totals = Feedback.objects.filter(match_id=donation_id).aggregate(
+        rating_count=Count('feedback_id'), rating_sum=Sum('rating'),
+    )
+    return Counter(rating_count=totals['rating_count'], rating_sum=totals['rating_sum'] or 0)
+
+
+@receiver(post_delete, sender=Donation)
+def _on_donation_deleted(sender, instance, **kwargs):
+    # The DonationRating row went with the donation (cascade). Its feedback stays in
+    # api_feedback, but like rebuild_ratings() the NGO no longer counts it.
+    if instance.ngo_id is None:
+        return
+    totals = donation_feedback_totals(instance.pk)
+    if totals['rating_count']:
+        removed = Counter({field: -value for field, value in totals.items()})
+        _apply(NGORating, 'ngo_id', {instance.ngo_id: removed}, create=False)
+
+
+def leaderboard(limit, min_ratings=1):
+    """Top ``limit`` NGOs by Bayesian average rating, read in NGORating index order."""
+    rows = list(
+        NGORating.objects.filter(rating_count__gte=min_ratings)
+        .order_by('-bayesian_rating', 'ngo_id')
+        .values_list('ngo_id', 'rating_count', 'rating_sum', 'bayesian_rating')[:limit]
+    )
+    names = dict(NGO.objects.filter(ngo_id__in=[row[0] for row in rows]).values_list('ngo_id', 'ngo_name'))
+    return [
+        {
+            'ngo_id': ngo_id,
+            'ngo_name': names.get(ngo_id),
+            'rating_count': count,
+            'avg_rating': round(total / count, 3),
+            'bayesian_rating': round(score, 3),
+        }
+        for ngo_id, count, total, score in rows
+    ]
+
+
+def rebuild_ratings(batch_size=1000):
+    """Recompute DonationRating and NGORating from api_feedback; return the number of rows."""
+    # Feedback.match_id is the rated donation's id (see Match)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT d.donation_id, d.ngo_id, COUNT(*), SUM(f.rating) "
+            "FROM api_feedback f JOIN api_donation d ON d.donation_id = f.match_id "
+            "GROUP BY d.donation_id, d.ngo_id"
+        )
+        rows = cursor.fetchall()
+    donations, ngos = [], defaultdict(Counter)
+    for donation_id, ngo_id, count, total in rows:
+        donations.append(DonationRating(
+            donation_id=donation_id, rating_count=count, rating_sum=total, bayesian_rating=bayesian(total, count),
+        ))
+        if ngo_id is not None:
+            ngos[ngo_id].update({'rating_count': count, 'rating_sum': total})
+
+    with transaction.atomic():
+        DonationRating.objects.all().delete()
+        NGORating.objects.all().delete()
+        DonationRating.objects.bulk_create(donations, batch_size=batch_size)
+        NGORating.objects.bulk_create(
+            [
+                NGORating(ngo_id=ngo_id, bayesian_rating=bayesian(totals['rating_sum'], totals['rating_count']), **totals)
+                for ngo_id, totals in ngos.items()
+            ],
+            batch_size=batch_size,
+        )
+    return len(donations) + len(ngos)
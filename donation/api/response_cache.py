@@ -0,0 +1,205 @@
+"""
+ETags and an optional shared cache of rendered JSON for the detail and list endpoints.
+
+Every object has a version token in the Django cache, and every resource has
+one for its list. Model signals replace the tokens after commit: post_save and
+post_delete, the bulk donation signals, and explicit ``bump()`` calls from bulk
+inserts. A response's strong ETag is derived from the tokens alone, so
+``If-None-Match`` is answered with 304 before the database or the serializer
+is touched.
+
+With RESPONSE_CACHE_BYTES on, the rendered body is also stored under its ETag,
+so a changed token is its invalidation.
+
+The tokens are only correct if every process that writes (web workers and the
+match_donations, allocate_donations and import_users commands) bumps the same
+ones, so ETags are off unless RESPONSE_CACHE_ETAGS is set, which it is by
+default with a shared cache (REDIS_URL). Off, the endpoints render as usual.
+A token also records when it was made: until REPLICA_PIN_SECONDS have passed
+the change behind it may not have reached the replicas, so the body for it is
+read from the primary.
+"""
+import contextlib
+import hashlib
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.http import parse_etags
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+from . import metrics
+from .models import Donor, Recipient, NGO, Donation
+from .signals import donations_created, donations_status_changed
+from project.db_routers import primary_reads
+
+RESOURCES = {Donor: 'donor', Recipient: 'recipient', NGO: 'ngo', Donation: 'donation'}
+LIST = '*'
+
+VERSION_KEY = 'response_cache:version:{}:{}'
+BODY_KEY = 'response_cache:body:{}'
+
+
+def _etag(resource, ident, version, variant):
+    digest = hashlib.sha256(f'{resource}|{ident}|{version}|{variant}'.encode()).hexdigest()[:32]
+    return f'"{digest}"'
+
+
+def _list_variant(request):
+    # Page links are absolute, so host and query string are part of the representation
+    return request.build_absolute_uri()
+
+
+def _new_version():
+    return f'{uuid.uuid4().hex}:{time.time():.3f}'
+
+
+def _reads_for(versions):
+    """Reads for a body rendered under ``versions``: the primary if any is newer than replication lag."""
+    horizon = time.time() - settings.REPLICA_PIN_SECONDS
+    if any(float(version.rpartition(':')[2]) > horizon for version in versions):
+        metrics.incr('response_cache.primary_renders')
+        return primary_reads()
+    return contextlib.nullcontext()
+
+
+def bump(resource, object_ids=()):
+    """Give the resource's list, and the given objects, new versions."""
+    if not settings.RESPONSE_CACHE_ETAGS:
+        return
+    keys = [VERSION_KEY.format(resource, LIST)] + [VERSION_KEY.format(resource, pk) for pk in object_ids]
+    cache.set_many({key: _new_version() for key in keys}, settings.RESPONSE_CACHE_VERSION_TIMEOUT)
+    metrics.incr('response_cache.invalidations', len(keys))
+
+
+def bump_on_commit(resource, object_ids=()):
+    # After commit, so no request can cache the pre-change rows under the new version
+    object_ids = list(object_ids)
+    transaction.on_commit(lambda: bump(resource, object_ids))
+
+
+def _version(resource, ident):
+    key = VERSION_KEY.format(resource, ident)
+    version = cache.get(key)
+    if version is None:
+        version = _new_version()
+        # add() so that concurrent first requests agree on one token
+        if not cache.add(key, version, settings.RESPONSE_CACHE_VERSION_TIMEOUT):
+            version = cache.get(key, version)
+    return version
+
+
+async def _aversion(resource, ident):
+    key = VERSION_KEY.format(resource, ident)
+    version = await cache.aget(key)
+    if version is None:
+        version = _new_version()
+        if not await cache.aadd(key, version, settings.RESPONSE_CACHE_VERSION_TIMEOUT):
+            version = await cache.aget(key, version)
+    return version
+
+
+def _not_modified(request, etag):
+    if etag in parse_etags(request.headers.get('If-None-Match', '')) or request.headers.get('If-None-Match') == '*':
+        metrics.incr('response_cache.not_modified')
+        response = HttpResponseNotModified()
+        response['ETag'] = etag
+        return response
+    return None
+
+
+def _json_response(body, etag=None):
+    response = HttpResponse(body, content_type='application/json')
+    if etag:
+        response['ETag'] = etag
+    return response
+
+
+def _wants_json(request):
+    # DRF views: only the JSON rendering is cached; the browsable API goes the normal way
+    renderer = getattr(request, 'accepted_renderer', None)
+    return renderer is None or renderer.format == 'json'
+
+
+def respond(request, resource, object_id, get_data, get_body=None, depends=()):
+    """Conditional/cached response for a detail (``object_id``) or list (None) endpoint.
+
+    ``get_data()`` returns the data to serialize; a ServiceError it raises propagates.
+    ``get_body()``, if given, returns the rendered JSON bytes directly (fast path).
+    ``depends`` names other resources embedded in the response (``?expand=``);
+    a change to any of them changes the ETag too.
+    """
+    if not _wants_json(request):
+        return Response(get_data())
+    if not settings.RESPONSE_CACHE_ETAGS:
+        return _json_response(get_body() if get_body else JSONRenderer().render(get_data()))
+    ident = LIST if object_id is None else object_id
+    variant = _list_variant(request) if object_id is None else ''
+    versions = [_version(resource, ident)] + [_version(dep, LIST) for dep in depends]
+    etag = _etag(resource, ident, ','.join(versions), variant)
+    not_modified = _not_modified(request, etag)
+    if not_modified:
+        return not_modified
+    body = cache.get(BODY_KEY.format(etag)) if settings.RESPONSE_CACHE_BYTES else None
+    if body is not None:
+        metrics.incr('response_cache.body_hits')
+        return _json_response(body, etag)
+    metrics.incr('response_cache.renders')
+    with _reads_for(versions):
+        body = get_body() if get_body else JSONRenderer().render(get_data())
+    if settings.RESPONSE_CACHE_BYTES:
+        cache.set(BODY_KEY.format(etag), body, settings.RESPONSE_CACHE_TIMEOUT)
+    return _json_response(body, etag)
+
+
+async def arespond(request, resource, object_id, aget_data=None, aget_body=None, depends=()):
+    """Async respond(); ``aget_data()`` and ``aget_body()`` are coroutine functions."""
+    if not settings.RESPONSE_CACHE_ETAGS:
+        return _json_response(await aget_body() if aget_body else JSONRenderer().render(await aget_data()))
+    ident = LIST if object_id is None else object_id
+    variant = _list_variant(request) if object_id is None else ''
+    versions = [await _aversion(resource, ident)] + [await _aversion(dep, LIST) for dep in depends]
+    etag = _etag(resource, ident, ','.join(versions), variant)
+    not_modified = _not_modified(request, etag)
+    if not_modified:
+        return not_modified
+    body = await cache.aget(BODY_KEY.format(etag)) if settings.RESPONSE_CACHE_BYTES else None
+    if body is not None:
+        metrics.incr('response_cache.body_hits')
+        return _json_response(body, etag)
+    metrics.incr('response_cache.renders')
+    # sync_to_async copies the context, so the ORM calls inside see primary_reads()
+    with _reads_for(versions):
+        body = await aget_body() if aget_body else JSONRenderer().render(await aget_data())
+    if settings.RESPONSE_CACHE_BYTES:
+        await cache.aset(BODY_KEY.format(etag), body, settings.RESPONSE_CACHE_TIMEOUT)
+    return _json_response(body, etag)
+
+
+@receiver(post_save, sender=Donor)
+@receiver(post_save, sender=Recipient)
+@receiver(post_save, sender=NGO)
+@receiver(post_save, sender=Donation)
+@receiver(post_delete, sender=Donor)
+@receiver(post_delete, sender=Recipient)
+@receiver(post_delete, sender=NGO)
+@receiver(post_delete, sender=Donation)
+def _bump_on_change(sender, instance, raw=False, **kwargs):
+    if not raw:
+        bump_on_commit(RESOURCES[sender], [instance.pk])
+
+
+@receiver(donations_created)
+def _bump_on_donations_created(sender, donations, **kwargs):
+    bump_on_commit('donation')
+
+
+@receiver(donations_status_changed)
+def _bump_on_status_changed(sender, donation_ids, **kwargs):
+    bump_on_commit('donation', donation_ids)
@@ -0,0 +1,22 @@
+"""
+Upsert shared by the incrementally maintained rollup tables (api.stats,
+api.analytics, api.trends and api.ratings).
+"""
+from django.db import IntegrityError, transaction
+
+
+def add_or_create(model, lookup, updates, create_fields=None):
+    """Apply ``updates`` (``F()`` deltas) to the ``lookup`` row, creating it if missing.
+
+    A missing row is created with ``lookup`` and ``create_fields``; with
+    ``create_fields=None`` it is left missing, e.g. for removals.
+    """
+    rows = model.objects.filter(**lookup)
+    if rows.update(**updates) or create_fields is None:
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(**lookup, **create_fields)
+    except IntegrityError:
+        # Created concurrently by another writer
+        rows.update(**updates)
@@ -1,5 +1,6 @@
 from rest_framework import serializers
-from .models import Donor, Recipient, NGO, Donation, Feedback
+from .models import Donor, Recipient, NGO, Donation, Feedback, AllocationRequest, Match
+from .ratings import RATING_MIN, RATING_MAX
 
 
 class DonorSerializer(serializers.ModelSerializer):
@@ -29,7 +30,50 @@ class DonationSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
+class PrefetchedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """Resolve the pk from ``context['prefetched'][model]`` instead of one query per value."""
+
+    def to_internal_value(self, data):
+        prefetched = self.context.get('prefetched', {}).get(self.get_queryset().model)
+        if prefetched is None:
+            return super().to_internal_value(data)
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            obj = prefetched.get(int(data))
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        if obj is None:
+            self.fail('does_not_exist', pk_value=data)
+        return obj
+
+
+class BulkDonationSerializer(DonationSerializer):
+    """DonationSerializer whose donor/ngo lookups come from a prefetched batch."""
+
+    donor = PrefetchedPrimaryKeyRelatedField(queryset=Donor.objects.all())
+    ngo = PrefetchedPrimaryKeyRelatedField(queryset=NGO.objects.all(), allow_null=True, required=False)
+
+
 class FeedbackSerializer(serializers.ModelSerializer):
     class Meta:
         model = Feedback
-        fields = '__all__'
\ No newline at end of file
+        fields = '__all__'
+        extra_kwargs = {'rating': {'min_value': RATING_MIN, 'max_value': RATING_MAX}}
+        # Repeat ratings are checked once per batch (services.submit_feedback_bulk), not per item
+        validators = []
+
+
+class AllocationRequestSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = AllocationRequest
+        fields = ['request_id', 'recipient', 'category', 'status', 'created_at']
+        read_only_fields = ['request_id', 'status', 'created_at']
+
+
+class MatchSerializer(serializers.ModelSerializer):
+    match_id = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = Match
+        fields = ['match_id', 'donation', 'recipient', 'request', 'created_at']
@@ -0,0 +1,217 @@
+"""
+In-process service layer shared by the REST API and the server-rendered frontend.
+
+The frontend used to call its own API over HTTP (``requests.post`` to
+``127.0.0.1:8000``), tying up a second worker per page view. Both sides now call
+these functions directly; they return the same payloads and raise the same error
+shapes the API responds with.
+"""
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.db import IntegrityError, transaction
+from rest_framework import serializers
+
+from .models import Donor, Recipient, NGO, Donation, Feedback
+from .parsers import InvalidLine
+from .serializers import (
+    DonorSerializer, RecipientSerializer, NGOSerializer, DonationSerializer, BulkDonationSerializer, FeedbackSerializer,
+)
+from .signals import donations_created, feedback_created
+from . import credentials, ngo_index
+
+
+class ServiceError(Exception):
+    """Raised when a service call fails; ``errors`` is the API error body."""
+
+    def __init__(self, errors, status=400):
+        super().__init__(errors)
+        self.errors = errors
+        self.status = status
+
+
+USER_SERIALIZERS = {
+    'donor': DonorSerializer,
+    'recipient': RecipientSerializer,
+    'ngo': NGOSerializer,
+}
+
+PROFILE_MODELS = {
+    'donor': (Donor, 'donor_id', DonorSerializer, 'Donor not found'),
+    'recipient': (Recipient, 'recipient_id', RecipientSerializer, 'Recipient not found'),
+    'ngo': (NGO, 'ngo_id', NGOSerializer, 'NGO not found'),
+}
+
+
+def password_fields(raw_password):
+    """Extra model fields for a new user: the hashed password, if one was given."""
+    return {'password': make_password(raw_password)} if raw_password else {}
+
+
+def create_user(role, data):
+    """Register a donor, recipient or NGO and return its serialized data (without password)."""
+    serializer_class = USER_SERIALIZERS[role]
+    password = data.get('password')
+    serializer = serializer_class(data=data)
+    if not serializer.is_valid():
+        raise ServiceError(serializer.errors)
+    other_role = credentials.registered_role(serializer.validated_data['email'], exclude_role=role)
+    if other_role:
+        raise ServiceError({'email': [f'This email is already registered as a {other_role}.']})
+    # Hash before saving so registration is a single INSERT (the old save + set_password + save
+    # issued a second, full-row UPDATE and ran the e-mail validation triggers twice)
+    serializer.save(**password_fields(password))
+    return serializer.data
+
+
+def get_profile(role, user_id):
+    """Return the serialized profile for a user, or raise a 404 ServiceError."""
+    model, pk_name, serializer_class, not_found = PROFILE_MODELS[role]
+    try:
+        user = model.objects.get(**{pk_name: user_id})
+    except model.DoesNotExist:
+        raise ServiceError({'error': not_found}, status=404)
+    return serializer_class(user).data
+
+
+async def aget_profile(role, user_id):
+    """Async get_profile()."""
+    model, pk_name, serializer_class, not_found = PROFILE_MODELS[role]
+    try:
+        user = await model.objects.aget(**{pk_name: user_id})
+    except model.DoesNotExist:
+        raise ServiceError({'error': not_found}, status=404)
+    return serializer_class(user).data
+
+
+def submit_donation(data):
+    """Validate and store a donation, returning its serialized data."""
+    serializer = DonationSerializer(data=data)
+    if not serializer.is_valid():
+        raise ServiceError(serializer.errors)
+    serializer.save()
+    return serializer.data
+
+
+def _prefetch_related(items):
+    """Load every donor/NGO referenced by the batch with one query each."""
+    def ids(key):
+        found = set()
+        for item in items:
+            try:
+                found.add(int(item[key]))
+            except (KeyError, TypeError, ValueError):
+                pass
+        return found
+    return {
+        Donor: Donor.objects.in_bulk(ids('donor')),
+        NGO: NGO.objects.in_bulk(ids('ngo')),
+    }
+
+
+def submit_donations_bulk(items):
+    """Validate and insert many donations in one transaction.
+
+    Invalid items are reported by index and skipped; valid ones are still stored.
+    Donations without an NGO are auto-assigned by donor city (one index lookup per
+    distinct city). Returns ``{'created': n, 'failed': m, 'errors': [...]}``.
+    """
+    if not isinstance(items, list):
+        raise ServiceError({'non_field_errors': ['Expected a JSON array or NDJSON body.']})
+    if len(items) > settings.BULK_DONATION_MAX_ITEMS:
+        raise ServiceError({'non_field_errors': [f'At most {settings.BULK_DONATION_MAX_ITEMS} donations per request.']})
+
+    objects = [item for item in items if isinstance(item, dict)]
+    list_serializer = BulkDonationSerializer(many=True, context={'prefetched': _prefetch_related(objects)})
+    child = list_serializer.child
+    valid, errors = [], []
+    for index, item in enumerate(items):
+        if isinstance(item, InvalidLine):
+            errors.append({'index': index, 'errors': {'non_field_errors': [item.message]}})
+            continue
+        try:
+            valid.append(child.run_validation(item))
+        except serializers.ValidationError as exc:
+            errors.append({'index': index, 'errors': exc.detail})
+
+    ngo_by_city = {}
+    donations = []
+    for data in valid:
+        donation = Donation(**data)
+        if donation.ngo_id is None:
+            city = data['donor'].city
+            if city not in ngo_by_city:
+                ngo_by_city[city] = ngo_index.first_ngo_in(city)
+            donation.ngo_id = ngo_by_city[city]
+        donations.append(donation)
+
+    if donations:
+        with transaction.atomic():
+            Donation.objects.bulk_create(donations, batch_size=settings.BULK_DONATION_BATCH_SIZE)
+            donations_created.send(sender=Donation, donations=donations)
+    return {'created': len(donations), 'failed': len(errors), 'errors': errors}
+
+
+def submit_feedback_bulk(items):
+    """Validate and insert many feedback entries in one transaction.
+
+    Ratings must be within RATING_MIN..RATING_MAX, ``match_id`` must name an
+    existing donation and a user rates a donation at most once; both checks are
+    one indexed query per batch, and the unique (match_id, user_id) constraint
+    catches a repeat inserted concurrently. Invalid items are reported by index
+    and skipped.
+    Returns ``{'created': n, 'failed': m, 'errors': [...]}``.
+    """
+    if not isinstance(items, list):
+        raise ServiceError({'non_field_errors': ['Expected a JSON array or NDJSON body.']})
+    if len(items) > settings.BULK_FEEDBACK_MAX_ITEMS:
+        raise ServiceError({'non_field_errors': [f'At most {settings.BULK_FEEDBACK_MAX_ITEMS} feedback entries per request.']})
+
+    child = FeedbackSerializer()
+    valid, errors = [], []
+    for index, item in enumerate(items):
+        if isinstance(item, InvalidLine):
+            errors.append({'index': index, 'errors': {'non_field_errors': [item.message]}})
+            continue
+        try:
+            valid.append((index, child.run_validation(item)))
+        except serializers.ValidationError as exc:
+            errors.append({'index': index, 'errors': exc.detail})
+
+    match_ids = {data['match_id'] for _, data in valid if data.get('match_id') is not None}
+    existing = set(Donation.objects.filter(donation_id__in=match_ids).values_list('donation_id', flat=True))
+    rated = set(Feedback.objects.filter(match_id__in=match_ids).values_list('match_id', 'user_id'))
+    pending = []
+    for index, data in valid:
+        match_id = data.get('match_id')
+        if match_id is not None:
+            if match_id not in existing:
+                errors.append({'index': index, 'errors': {'match_id': [f'Donation {match_id} does not exist.']}})
+                continue
+            if (match_id, data['user_id']) in rated:
+                errors.append({'index': index, 'errors': {'match_id': ['This user has already rated this donation.']}})
+                continue
+            rated.add((match_id, data['user_id']))
+        pending.append((index, Feedback(**data)))
+
+    feedbacks = []
+    if pending:
+        with transaction.atomic():
+            try:
+                with transaction.atomic():
+                    Feedback.objects.bulk_create([f for _, f in pending], batch_size=settings.BULK_DONATION_BATCH_SIZE)
+                feedbacks = [f for _, f in pending]
+            except IntegrityError:
+                # Rated by a concurrent request since the check: insert one at a time to find which
+                for index, feedback in pending:
+                    feedback.pk = None
+                    try:
+                        with transaction.atomic():
+                            Feedback.objects.bulk_create([feedback])
+                    except IntegrityError:
+                        errors.append({'index': index, 'errors': {'match_id': ['This user has already rated this donation.']}})
+                    else:
+                        feedbacks.append(feedback)
+            if feedbacks:
+                feedback_created.send(sender=Feedback, feedbacks=feedbacks)
+    errors.sort(key=lambda error: error['index'])
+    return {'created': len(feedbacks), 'failed': len(errors), 'errors': errors}
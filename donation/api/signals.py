@@ -0,0 +1,55 @@
+"""
+Donation change notifications.
+
+Rollups (api.stats and friends) listen to two signals instead of the raw model
+signals. Bulk code paths (``bulk_create``/``bulk_update``/``update()``) skip
+``post_save``, so they send these explicitly:
+
+* ``donations_created(donations)`` - newly stored Donation instances.
+* ``donations_status_changed(donation_ids, old_status, new_status)`` - donations
+  that moved from one status to another.
+* ``feedback_created(feedbacks)`` - newly stored Feedback instances.
+
+Single-object saves are translated here, so ``Donation.save()`` and
+``Feedback.save()`` need nothing extra.
+"""
+from django.db.models.signals import post_save, pre_save
+from django.dispatch import Signal, receiver
+
+from .models import Donation, Feedback
+
+donations_created = Signal()
+donations_status_changed = Signal()
+feedback_created = Signal()
+
+
+@receiver(pre_save, sender=Donation)
+def _remember_old_status(sender, instance, raw=False, update_fields=None, **kwargs):
+    instance._old_status = None
+    if raw or instance._state.adding or instance.pk is None:
+        return
+    if update_fields is not None and 'status' not in update_fields:
+        return
+    instance._old_status = (
+        Donation.objects.filter(pk=instance.pk).values_list('status', flat=True).first()
+    )
+
+
+@receiver(post_save, sender=Donation)
+def _announce_donation_change(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        donations_created.send(sender=Donation, donations=[instance])
+        return
+    old_status = getattr(instance, '_old_status', None)
+    if old_status is not None and old_status != instance.status:
+        donations_status_changed.send(
+            sender=Donation, donation_ids=[instance.pk], old_status=old_status, new_status=instance.status,
+        )
+
+
+@receiver(post_save, sender=Feedback)
+def _announce_feedback(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        feedback_created.send(sender=Feedback, feedbacks=[instance])
@@ -0,0 +1,134 @@
+"""
+Incrementally maintained donor KPIs (DonorStats).
+
+Each donation insert, status change, delete and feedback insert or delete applies a small
+``F()`` delta to the donor's row, so the dashboard reads one row by primary key
+instead of aggregating api_donation and api_feedback on every page load.
+``rebuild_donor_stats()`` recomputes everything from scratch in bulk.
+"""
+from collections import Counter, defaultdict
+
+from django.db import connection, transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from .models import Donation, DonorStats, Feedback
+from .ratings import donation_feedback_totals
+from .rollups import add_or_create
+from .signals import donations_created, donations_status_changed, feedback_created
+
+# A donation that reached the recipient allocation stage was delivered first
+DELIVERED_STATUSES = ('delivered', 'allocated')
+PENDING_STATUSES = ('pending',)
+
+FIELDS = ['total_donations', 'total_items', 'delivered_count', 'pending_count', 'rating_sum', 'rating_count']
+
+
+def _status_deltas(status, sign=1):
+    return {
+        'delivered_count': sign if status in DELIVERED_STATUSES else 0,
+        'pending_count': sign if status in PENDING_STATUSES else 0,
+    }
+
+
+def apply_delta(donor_id, create=True, **deltas):
+    """Add ``deltas`` to the donor's DonorStats row, creating the row if needed and allowed."""
+    deltas = {field: value for field, value in deltas.items() if value}
+    if not deltas:
+        return
+    updates = {field: F(field) + value for field, value in deltas.items()}
+    add_or_create(DonorStats, {'donor_id': donor_id}, updates, deltas if create else None)
+
+
+@receiver(donations_created)
+def _on_donations_created(sender, donations, **kwargs):
+    totals = defaultdict(Counter)
+    for donation in donations:
+        totals[donation.donor_id].update({'total_donations': 1, 'total_items': donation.quantity or 0})
+        totals[donation.donor_id].update(_status_deltas(donation.status))
+    for donor_id, deltas in totals.items():
+        apply_delta(donor_id, **deltas)
+
+
+@receiver(donations_status_changed)
+def _on_status_changed(sender, donation_ids, old_status, new_status, **kwargs):
+    delta = Counter(_status_deltas(new_status))
+    delta.subtract(_status_deltas(old_status))
+    if not any(delta.values()):
+        return
+    per_donor = (
+        Donation.objects.filter(donation_id__in=donation_ids)
+        .values_list('donor_id').annotate(n=Count('donation_id')).values_list('donor_id', 'n')
+    )
+    for donor_id, n in per_donor:
+        apply_delta(donor_id, **{field: value * n for field, value in delta.items()})
+
+
+@receiver(post_delete, sender=Donation)
+def _on_donation_deleted(sender, instance, **kwargs):
+    deltas = {'total_donations': -1, 'total_items': -(instance.quantity or 0)}
+    deltas.update(_status_deltas(instance.status, sign=-1))
+    # Its feedback stays in api_feedback, but like rebuild_donor_stats() no longer counts
+    ratings = donation_feedback_totals(instance.pk)
+    deltas.update({'rating_sum': -ratings['rating_sum'], 'rating_count': -ratings['rating_count']})
+    # Never create a row here: the donor itself may be in the middle of a cascade delete
+    apply_delta(instance.donor_id, create=False, **deltas)
+
+
+def record_feedback(feedbacks, sign=1):
+    """Add feedback ratings to the rollup of the donor whose donation was rated (``sign=-1`` removes them)."""
+    by_donation = defaultdict(list)
+    for feedback in feedbacks:
+        if feedback.match_id is not None:
+            by_donation[feedback.match_id].append(feedback.rating)
+    donors = dict(Donation.objects.filter(donation_id__in=list(by_donation)).values_list('donation_id', 'donor_id'))
+    totals = defaultdict(Counter)
+    for donation_id, ratings in by_donation.items():
+        if donation_id in donors:
+            totals[donors[donation_id]].update({'rating_sum': sign * sum(ratings), 'rating_count': sign * len(ratings)})
+    for donor_id, deltas in totals.items():
+        apply_delta(donor_id, create=sign > 0, **deltas)
+
+
+@receiver(feedback_created)
+def _on_feedback_created(sender, feedbacks, **kwargs):
+    record_feedback(feedbacks)
+
+
+@receiver(post_delete, sender=Feedback)
+def _on_feedback_deleted(sender, instance, **kwargs):
+    record_feedback([instance], sign=-1)
+
+
+def rebuild_donor_stats(batch_size=1000):
+    """Recompute every DonorStats row from api_donation and api_feedback; return the row count."""
+    rows = defaultdict(lambda: dict.fromkeys(FIELDS, 0))
+    donation_totals = Donation.objects.values('donor_id').annotate(
+        total_donations=Count('donation_id'),
+        total_items=Sum('quantity'),
+        delivered_count=Count('donation_id', filter=Q(status__in=DELIVERED_STATUSES)),
+        pending_count=Count('donation_id', filter=Q(status__in=PENDING_STATUSES)),
+    )
+    for row in donation_totals:
+        donor_id = row.pop('donor_id')
+        row['total_items'] = row['total_items'] or 0
+        rows[donor_id].update(row)
+
+    # Feedback.match_id is the rated donation's id (see Match)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT d.donor_id, SUM(f.rating), COUNT(*) "
+            "FROM api_feedback f JOIN api_donation d ON d.donation_id = f.match_id "
+            "GROUP BY d.donor_id"
+        )
+        for donor_id, rating_sum, rating_count in cursor.fetchall():
+            rows[donor_id].update(rating_sum=rating_sum or 0, rating_count=rating_count)
+
+    with transaction.atomic():
+        DonorStats.objects.all().delete()
+        DonorStats.objects.bulk_create(
+            [DonorStats(donor_id=donor_id, **values) for donor_id, values in rows.items()],
+            batch_size=batch_size,
+        )
+    return len(rows)
@@ -0,0 +1,124 @@
+"""
+Login throttling and bounded password verification.
+
+Attempts are counted per client IP and, for failed attempts, per email in
+sliding windows stored in the Django cache, so the limits hold across workers
+that share a cache (see REDIS_URL). Each window is approximated by weighting the
+previous fixed bucket by how much of it still overlaps the window.
+
+Password hashes can optionally be verified on a small bounded thread pool
+(LOGIN_HASH_WORKERS). When every worker is busy and the wait queue is full,
+verification fails fast with ``HashPoolBusy`` (429), so a credential-stuffing
+burst cannot take every request thread.
+"""
+import hashlib
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import verify_password as _verify_password
+from django.core.cache import cache
+
+from . import metrics
+
+
+class HashPoolBusy(Exception):
+    """The password verification pool and its queue are full."""
+
+
+class SlidingWindow:
+    def __init__(self, scope, limit, window):
+        self.scope = scope
+        self.limit = limit
+        self.window = window
+
+    def _key(self, ident, bucket):
+        digest = hashlib.sha256(ident.encode()).hexdigest()[:32]
+        return f'throttle:{self.scope}:{digest}:{bucket}'
+
+    def _buckets(self, ident, now):
+        bucket = int(now // self.window)
+        return self._key(ident, bucket), self._key(ident, bucket - 1), (now % self.window) / self.window
+
+    def count(self, ident, now=None):
+        current, previous, elapsed = self._buckets(ident, time.time() if now is None else now)
+        counts = cache.get_many([current, previous])
+        return counts.get(current, 0) + counts.get(previous, 0) * (1 - elapsed)
+
+    def retry_after(self, ident, now=None):
+        """Seconds to wait if ``ident`` is over the limit, else None."""
+        now = time.time() if now is None else now
+        if self.count(ident, now) < self.limit:
+            return None
+        return max(1, math.ceil(self.window - now % self.window))
+
+    def hit(self, ident, now=None):
+        current, _, _ = self._buckets(ident, time.time() if now is None else now)
+        # The bucket must outlive the window that still weights it
+        cache.add(current, 0, timeout=self.window * 2)
+        try:
+            cache.incr(current)
+        except ValueError:
+            # Evicted between add() and incr()
+            cache.set(current, 1, timeout=self.window * 2)
+
+
+def _ip_window():
+    return SlidingWindow('login-ip', settings.LOGIN_IP_LIMIT, settings.LOGIN_IP_WINDOW)
+
+
+def _email_window():
+    return SlidingWindow('login-email', settings.LOGIN_EMAIL_LIMIT, settings.LOGIN_EMAIL_WINDOW)
+
+
+def check_login(ip, email):
+    """Count a login attempt from ``ip``; return seconds to wait if it must be rejected, else None."""
+    ip_window, email_window = _ip_window(), _email_window()
+    retry = ip_window.retry_after(ip)
+    if retry is not None:
+        metrics.incr('login.rejected_ip')
+        return retry
+    email = (email or '').lower()
+    retry = email_window.retry_after(email) if email else None
+    if retry is not None:
+        metrics.incr('login.rejected_email')
+        return retry
+    ip_window.hit(ip)
+    return None
+
+
+def login_failed(email):
+    """Count a failed attempt against the email, whichever IP it came from."""
+    metrics.incr('login.failed')
+    if email:
+        _email_window().hit(email.lower())
+
+
+_pool = {'executor': None, 'slots': None}
+_pool_lock = threading.Lock()
+
+
+def _get_pool():
+    with _pool_lock:
+        if _pool['executor'] is None:
+            workers = settings.LOGIN_HASH_WORKERS
+            _pool['executor'] = ThreadPoolExecutor(workers, thread_name_prefix='login-hash')
+            _pool['slots'] = threading.BoundedSemaphore(workers + settings.LOGIN_HASH_QUEUE)
+        return _pool['executor'], _pool['slots']
+
+
+def verify_password(raw_password, encoded):
+    """Return (is_correct, must_update) as Django's verify_password, on the bounded pool when enabled."""
+    if not settings.LOGIN_HASH_WORKERS:
+        return _verify_password(raw_password, encoded)
+    executor, slots = _get_pool()
+    if not slots.acquire(blocking=False):
+        metrics.incr('login.hash_rejected')
+        raise HashPoolBusy
+    metrics.incr('login.hash_queued')
+    try:
+        return executor.submit(_verify_password, raw_password, encoded).result()
+    finally:
+        slots.release()
@@ -0,0 +1,235 @@
+"""
+Time-bucketed donation rollup (DonationBucket) for trend charts.
+
+Each donation is counted, with its quantity, in one day, one week (starting
+Monday) and one month bucket, keyed by its donor's city, its category and its
+status. Inserts, status changes and deletes apply ``F()`` deltas, so a chart
+reads a few hundred rollup rows instead of scanning api_donation. The city is
+the donor's current one, as ``backfill_buckets()`` sees it: when a donor moves,
+their donations' counts move to the new city.
+``backfill_buckets()`` recomputes the rollup from history in chunks.
+"""
+import datetime
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Max, Sum
+from django.db.models.functions import Coalesce, TruncDate
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from .filters import FilterError
+from .models import Donation, DonationBucket, Donor
+from .rollups import add_or_create
+from .signals import donations_created, donations_status_changed
+
+DAY, WEEK, MONTH = 'day', 'week', 'month'
+GRANULARITIES = (DAY, WEEK, MONTH)
+# Series filters and the bucket columns they match
+SERIES_FILTERS = ('city', 'category', 'status')
+
+
+def bucket_start(day, granularity):
+    if granularity == WEEK:
+        return day - datetime.timedelta(days=day.weekday())
+    if granularity == MONTH:
+        return day.replace(day=1)
+    return day
+
+
+def next_bucket(start, granularity):
+    if granularity == WEEK:
+        return start + datetime.timedelta(weeks=1)
+    if granularity == MONTH:
+        return (start + datetime.timedelta(days=32)).replace(day=1)
+    return start + datetime.timedelta(days=1)
+
+
+def _add(totals, day, city, category, status, count, items):
+    """Add a day's figures to its bucket of every granularity."""
+    for granularity in GRANULARITIES:
+        totals[(granularity, bucket_start(day, granularity), city, category, status)].update(
+            {'count': count, 'items': items}
+        )
+
+
+def _city(city):
+    # A donor without a city is counted under ''
+    return city or ''
+
+
+def _donor_city(donor_id):
+    return _city(Donor.objects.filter(donor_id=donor_id).values_list('city', flat=True).first())
+
+
+def apply_deltas(totals):
+    """Add {(granularity, bucket_start, city, category, status): Counter(count=, items=)} to the rollup."""
+    for (granularity, start, city, category, status), delta in totals.items():
+        if not delta['count'] and not delta['items']:
+            continue
+        key = {'granularity': granularity, 'bucket_start': start, 'city': city, 'category': category, 'status': status}
+        updates = {'count': F('count') + delta['count'], 'items': F('items') + delta['items']}
+        add_or_create(DonationBucket, key, updates, {'count': delta['count'], 'items': delta['items']})
+
+
+@receiver(donations_created)
+def _on_donations_created(sender, donations, **kwargs):
+    cities = dict(Donor.objects.filter(donor_id__in={d.donor_id for d in donations}).values_list('donor_id', 'city'))
+    totals = defaultdict(Counter)
+    for donation in donations:
+        _add(totals, timezone.localdate(donation.created_at), _city(cities.get(donation.donor_id)),
+             donation.category, donation.status, 1, donation.quantity or 0)
+    apply_deltas(totals)
+
+
+@receiver(donations_status_changed)
+def _on_status_changed(sender, donation_ids, old_status, new_status, **kwargs):
+    moved = (
+        Donation.objects.filter(donation_id__in=donation_ids)
+        .annotate(day=TruncDate('created_at'))
+        .values_list('day', 'donor__city', 'category')
+        .annotate(n=Count('donation_id'), items=Coalesce(Sum('quantity'), 0))
+        .order_by()
+    )
+    totals = defaultdict(Counter)
+    for day, city, category, n, items in moved:
+        _add(totals, day, _city(city), category, old_status, -n, -items)
+        _add(totals, day, _city(city), category, new_status, n, items)
+    apply_deltas(totals)
+
+
+@receiver(post_delete, sender=Donation)
+def _on_donation_deleted(sender, instance, **kwargs):
+    # Runs before a cascading donor delete removes the donor row
+    totals = defaultdict(Counter)
+    _add(totals, timezone.localdate(instance.created_at), _donor_city(instance.donor_id), instance.category,
+         instance.status, -1, -(instance.quantity or 0))
+    apply_deltas(totals)
+
+
+@receiver(pre_save, sender=Donor)
+def _remember_old_city(sender, instance, raw=False, update_fields=None, **kwargs):
+    instance._old_trend_city = None
+    if raw or instance._state.adding or instance.pk is None:
+        return
+    if update_fields is not None and 'city' not in update_fields:
+        return
+    instance._old_trend_city = Donor.objects.filter(pk=instance.pk).values_list('city', flat=True).first()
+
+
+@receiver(post_save, sender=Donor)
+def _on_donor_saved(sender, instance, created, raw=False, **kwargs):
+    old_city = getattr(instance, '_old_trend_city', None)
+    if raw or created or old_city is None or _city(old_city) == _city(instance.city):
+        return
+    moved = (
+        Donation.objects.filter(donor_id=instance.pk)
+        .annotate(day=TruncDate('created_at'))
+        .values_list('day', 'category', 'status')
+        .annotate(n=Count('donation_id'), items=Coalesce(Sum('quantity'), 0))
+        .order_by()
+    )
+    totals = defaultdict(Counter)
+    for day, category, status, n, items in moved:
+        _add(totals, day, _city(old_city), category, status, -n, -items)
+        _add(totals, day, _city(instance.city), category, status, n, items)
+    apply_deltas(totals)
+
+
+def backfill_buckets(chunk_size=10000, batch_size=1000, progress=None):
+    """Recompute the whole rollup from api_donation; return the number of buckets.
+
+    Donations are aggregated per day in SQL, one donation_id range at a time,
+    and the rollup is replaced in one transaction at the end.
+    """
+    totals = defaultdict(Counter)
+    last_id = Donation.objects.aggregate(last=Max('donation_id'))['last'] or 0
+    for low in range(0, last_id, chunk_size):
+        daily = (
+            Donation.objects.filter(donation_id__gt=low, donation_id__lte=low + chunk_size)
+            .annotate(day=TruncDate('created_at'))
+            .values_list('day', 'donor__city', 'category', 'status')
+            .annotate(n=Count('donation_id'), items=Coalesce(Sum('quantity'), 0))
+            .order_by()
+        )
+        for day, city, category, status, n, items in daily:
+            _add(totals, day, _city(city), category, status, n, items)
+        if progress:
+            progress(min(low + chunk_size, last_id), last_id)
+
+    with transaction.atomic():
+        DonationBucket.objects.all().delete()
+        DonationBucket.objects.bulk_create(
+            [
+                DonationBucket(granularity=granularity, bucket_start=start, city=city, category=category,
+                               status=status, count=delta['count'], items=delta['items'])
+                for (granularity, start, city, category, status), delta in totals.items()
+                if delta['count']
+            ],
+            batch_size=batch_size,
+        )
+    return len(totals)
+
+
+def _parse_day(params, name, default):
+    value = params.get(name)
+    if not value:
+        return default
+    try:
+        day = parse_date(value)
+    except ValueError:
+        day = None
+    if day is None:
+        raise FilterError(f"Invalid date: '{value}'")
+    return day
+
+
+def series(params):
+    """Dense donation series for ``?granularity=&start=&end=&city=&category=&status=``.
+
+    Every bucket from ``start`` to ``end`` (inclusive) is listed, with zeros for
+    buckets without donations. Raises FilterError for invalid parameters.
+    """
+    granularity = params.get('granularity') or DAY
+    if granularity not in GRANULARITIES:
+        raise FilterError(f"Invalid granularity '{granularity}', use one of: {', '.join(GRANULARITIES)}")
+    end = bucket_start(_parse_day(params, 'end', timezone.localdate()), granularity)
+    first = end
+    for _ in range(settings.DONATION_SERIES_DEFAULT_POINTS - 1):
+        first = bucket_start(first - datetime.timedelta(days=1), granularity)
+    start = bucket_start(_parse_day(params, 'start', first), granularity)
+    if start > end:
+        raise FilterError('start must not be after end')
+
+    buckets = []
+    current = start
+    while current <= end:
+        if len(buckets) >= settings.DONATION_SERIES_MAX_POINTS:
+            raise FilterError(
+                f'More than {settings.DONATION_SERIES_MAX_POINTS} {granularity} buckets requested, '
+                f'narrow the range or use a coarser granularity'
+            )
+        buckets.append(current)
+        current = next_bucket(current, granularity)
+
+    rows = DonationBucket.objects.filter(granularity=granularity, bucket_start__gte=start, bucket_start__lte=end)
+    for name in SERIES_FILTERS:
+        if params.get(name):
+            rows = rows.filter(**{name: params[name]})
+    totals = (
+        rows.values_list('bucket_start').annotate(n=Sum('count'), q=Sum('items'))
+        .values_list('bucket_start', 'n', 'q').order_by()
+    )
+    found = {day: (count, items) for day, count, items in totals}
+    return {
+        'granularity': granularity,
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'series': [
+            dict(zip(('bucket', 'count', 'items'), (day.isoformat(), *found.get(day, (0, 0)))))
+            for day in buckets
+        ],
+    }
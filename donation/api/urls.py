@@ -1,15 +1,33 @@
+from django.conf import settings
 from django.urls import path
-from . import views
+from . import async_views, views
+
+# Under ASGI the hot read endpoints are served by their async versions
+hot_views = async_views if settings.ASYNC_VIEWS else views
 
 urlpatterns = [
-    path('health/', views.health),
+    path('health/', hot_views.health),
+    path('metrics/', views.metrics_view),
     path('demo/superadmin/', views.superadmin_demo),
-    path('donors/', views.donors_list_create),
-    path('donors/<int:donor_id>/', views.donor_detail),
-    path('recipients/', views.recipients_list_create),
-    path('recipients/<int:recipient_id>/', views.recipient_detail),
-    path('ngos/', views.ngos_list_create),
-    path('ngos/<int:ngo_id>/', views.ngo_detail),
-    path('donations/', views.donations_list_create),
+    path('users/import/', views.import_users),
+    path('donors/', hot_views.donors_list_create),
+    path('donors/export/', views.donors_export),
+    path('donors/<int:donor_id>/', hot_views.donor_detail),
+    path('recipients/', hot_views.recipients_list_create),
+    path('recipients/export/', views.recipients_export),
+    path('recipients/<int:recipient_id>/', hot_views.recipient_detail),
+    path('ngos/', hot_views.ngos_list_create),
+    path('ngos/export/', views.ngos_export),
+    path('ngos/leaderboard/', views.ngo_leaderboard),
+    path('ngos/<int:ngo_id>/', hot_views.ngo_detail),
+    path('donations/', hot_views.donations_list_create),
+    path('donations/export/', views.donations_export),
+    path('donations/bulk/', views.donations_bulk_create),
+    path('donations/trends/', views.donation_trends),
     path('donations/match/', views.match_donation),
+    path('donations/match/batch/', views.match_donations_batch),
+    path('allocation/requests/', views.allocation_requests_list_create),
+    path('allocation/run/', views.run_allocation),
+    path('matches/', views.matches_list),
+    path('feedback/batch/', views.feedback_batch_create),
 ]
\ No newline at end of file
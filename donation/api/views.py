@@ -1,10 +1,21 @@
-from rest_framework.decorators import api_view, permission_classes
+import io
+
+from rest_framework.decorators import api_view, parser_classes, permission_classes
+from rest_framework.parsers import JSONParser, MultiPartParser
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
-from django.db import connection
+from django.conf import settings
+from django.http import JsonResponse, StreamingHttpResponse
 from django.views.decorators.csrf import csrf_exempt
-from .models import Donor, Recipient, NGO, Donation, Feedback
-from .serializers import DonorSerializer, RecipientSerializer, NGOSerializer, DonationSerializer, FeedbackSerializer
+from django.views.decorators.http import require_GET
+from .models import Donor, Recipient, NGO, Donation, Feedback, AllocationRequest, Match
+from .serializers import DonorSerializer, RecipientSerializer, NGOSerializer, FeedbackSerializer, AllocationRequestSerializer, MatchSerializer
+from .pagination import KeysetPaginator
+from .filters import FilterError, donation_ordering, filter_depends, filter_donations
+from .parsers import NDJSONParser
+from . import allocation, analytics, exports, fast_serializers, importer, matching, metrics, ratings, response_cache, trends
+from . import services
+from project.db_routers import replica_reads
 
 
 @api_view(['GET'])
@@ -14,143 +25,327 @@ def health(request):
 
 
 @api_view(['GET'])
+def metrics_view(request):
+    # process-local operational counters (cache hit rates etc.)
+    return Response(metrics.snapshot())
+
+
+@api_view(['GET'])
+@replica_reads
 def superadmin_demo(request):
-    # Demonstrate a couple of SQL features for the viva; expand as needed
-    with connection.cursor() as cursor:
-        cursor.execute("SELECT COUNT(*) FROM api_donation")
-        donation_count = cursor.fetchone()[0]
-        cursor.execute("SELECT city, COUNT(*) AS c FROM api_recipient GROUP BY city HAVING COUNT(*) > 0 ORDER BY c DESC LIMIT 5")
-        top_cities = cursor.fetchall()
-    return Response({
-        'donation_count': donation_count,
-        'top_cities': [{'city': row[0], 'count': row[1]} for row in top_cities],
-    })
+    # Served from precomputed counters; ?refresh=1 skips the cached snapshot
+    refresh = request.query_params.get('refresh') in ('1', 'true')
+    return Response(analytics.snapshot(refresh=refresh))
+
+
+@api_view(['GET'])
+@replica_reads
+def donation_trends(request):
+    # Dense per-bucket counts from the DonationBucket rollup
+    try:
+        return Response(trends.series(request.query_params))
+    except FilterError as e:
+        return Response({'error': str(e)}, status=400)
 
 
 @csrf_exempt
 @api_view(['GET', 'POST'])
+@replica_reads
 def donors_list_create(request):
     if request.method == 'GET':
-        donors = Donor.objects.all()
-        # Don't include password in the response
-        serializer = DonorSerializer(donors, many=True)
-        return Response(serializer.data)
-    elif request.method == 'POST':
-        # Handle password hashing
-        password = request.data.get('password')
-        serializer = DonorSerializer(data=request.data)
-        if serializer.is_valid():
-            donor = serializer.save()
-            if password:
-                donor.set_password(password)
-                donor.save()
+        def page():
+            paginator = KeysetPaginator(request, 'donor_id')
+            donors = paginator.paginate(Donor.objects.all())
             # Don't include password in the response
-            response_data = serializer.data
-            return Response(response_data, status=201)
-        return Response(serializer.errors, status=400)
+            serializer = DonorSerializer(donors, many=True)
+            return paginator.get_paginated_data(serializer.data)
+
+        def body():
+            return fast_serializers.donors.paginate(KeysetPaginator(request, 'donor_id'), Donor.objects.all())
+        return response_cache.respond(request, 'donor', None, page, body)
+    elif request.method == 'POST':
+        try:
+            # Password is hashed by the service and never included in the response
+            return Response(services.create_user('donor', request.data), status=201)
+        except services.ServiceError as e:
+            return Response(e.errors, status=e.status)
 
 
 @csrf_exempt
 @api_view(['GET', 'POST'])
+@replica_reads
 def recipients_list_create(request):
     if request.method == 'GET':
-        recipients = Recipient.objects.all()
-        # Don't include password in the response
-        serializer = RecipientSerializer(recipients, many=True)
-        return Response(serializer.data)
-    elif request.method == 'POST':
-        # Handle password hashing
-        password = request.data.get('password')
-        serializer = RecipientSerializer(data=request.data)
-        if serializer.is_valid():
-            recipient = serializer.save()
-            if password:
-                recipient.set_password(password)
-                recipient.save()
+        def page():
+            paginator = KeysetPaginator(request, 'recipient_id')
+            recipients = paginator.paginate(Recipient.objects.all())
             # Don't include password in the response
-            response_data = serializer.data
-            return Response(response_data, status=201)
-        return Response(serializer.errors, status=400)
+            serializer = RecipientSerializer(recipients, many=True)
+            return paginator.get_paginated_data(serializer.data)
+
+        def body():
+            return fast_serializers.recipients.paginate(KeysetPaginator(request, 'recipient_id'), Recipient.objects.all())
+        return response_cache.respond(request, 'recipient', None, page, body)
+    elif request.method == 'POST':
+        try:
+            # Password is hashed by the service and never included in the response
+            return Response(services.create_user('recipient', request.data), status=201)
+        except services.ServiceError as e:
+            return Response(e.errors, status=e.status)
 
 
 @csrf_exempt
 @api_view(['GET', 'POST'])
+@replica_reads
 def ngos_list_create(request):
     if request.method == 'GET':
-        ngos = NGO.objects.all()
-        # Don't include password in the response
-        serializer = NGOSerializer(ngos, many=True)
-        return Response(serializer.data)
-    elif request.method == 'POST':
-        # Handle password hashing
-        password = request.data.get('password')
-        serializer = NGOSerializer(data=request.data)
-        if serializer.is_valid():
-            ngo = serializer.save()
-            if password:
-                ngo.set_password(password)
-                ngo.save()
+        def page():
+            paginator = KeysetPaginator(request, 'ngo_id')
+            ngos = paginator.paginate(NGO.objects.all())
             # Don't include password in the response
-            response_data = serializer.data
-            return Response(response_data, status=201)
-        return Response(serializer.errors, status=400)
+            serializer = NGOSerializer(ngos, many=True)
+            return paginator.get_paginated_data(serializer.data)
+
+        def body():
+            return fast_serializers.ngos.paginate(KeysetPaginator(request, 'ngo_id'), NGO.objects.all())
+        return response_cache.respond(request, 'ngo', None, page, body)
+    elif request.method == 'POST':
+        try:
+            # Password is hashed by the service and never included in the response
+            return Response(services.create_user('ngo', request.data), status=201)
+        except services.ServiceError as e:
+            return Response(e.errors, status=e.status)
+
+
+def donation_listing(params):
+    """Parse a donation list query into (RowEncoder selection, filtered queryset, ordering, depends).
+
+    ?fields=title,status selects columns, ?expand=donor,ngo embeds the related objects,
+    the DONATION_FILTERS narrow the rows and ?ordering= sorts them. ``depends`` lists
+    the other resources the response reads, for its ETag. Raises FilterError.
+    """
+    selection = fast_serializers.donations.select(params.get('fields'), params.get('expand'))
+    ordering = donation_ordering(params)
+    depends = sorted(set(selection.expand) | filter_depends(params))
+    return selection, filter_donations(Donation.objects.all(), params), ordering, depends
 
 
 @csrf_exempt
 @api_view(['GET', 'POST'])
+@replica_reads
 def donations_list_create(request):
     if request.method == 'GET':
-        items = Donation.objects.select_related('donor', 'ngo').all()
-        return Response(DonationSerializer(items, many=True).data)
-    serializer = DonationSerializer(data=request.data)
-    serializer.is_valid(raise_exception=True)
-    serializer.save()
-    return Response(serializer.data)
+        try:
+            selection, items, ordering, depends = donation_listing(request.query_params)
+        except FilterError as e:
+            return Response({'error': str(e)}, status=400)
+
+        def page():
+            paginator = KeysetPaginator(request, 'donation_id', ordering)
+            rows = paginator.paginate(selection.queryset(items, paginator.key_fields))
+            return paginator.get_paginated_data(selection.serializer(rows).data)
+
+        def body():
+            return selection.paginate(KeysetPaginator(request, 'donation_id', ordering), items)
+        return response_cache.respond(request, 'donation', None, page, body, depends=depends)
+    try:
+        return Response(services.submit_donation(request.data))
+    except services.ServiceError as e:
+        return Response(e.errors, status=e.status)
+
+
+@csrf_exempt
+@api_view(['POST'])
+@parser_classes([JSONParser, NDJSONParser])
+def donations_bulk_create(request):
+    # JSON array or NDJSON of donations; invalid items are reported, valid ones stored
+    try:
+        result = services.submit_donations_bulk(request.data)
+    except services.ServiceError as e:
+        return Response(e.errors, status=e.status)
+    if not result['failed']:
+        status = 201
+    elif result['created']:
+        status = 207
+    else:
+        status = 400
+    return Response(result, status=status)
+
+
+@csrf_exempt
+@api_view(['POST'])
+@parser_classes([JSONParser, NDJSONParser])
+def feedback_batch_create(request):
+    # JSON array or NDJSON of feedback; invalid items are reported, valid ones stored
+    try:
+        result = services.submit_feedback_bulk(request.data)
+    except services.ServiceError as e:
+        return Response(e.errors, status=e.status)
+    if not result['failed']:
+        status = 201
+    elif result['created']:
+        status = 207
+    else:
+        status = 400
+    return Response(result, status=status)
 
 
 @api_view(['GET'])
+@replica_reads
+def ngo_leaderboard(request):
+    # Ranked from the NGORating aggregates only
+    try:
+        limit = int(request.query_params.get('limit', 10))
+        min_ratings = int(request.query_params.get('min_ratings', 1))
+    except ValueError:
+        return Response({'error': 'limit and min_ratings must be integers'}, status=400)
+    limit = max(1, min(limit, settings.LEADERBOARD_MAX_LIMIT))
+    return Response({'results': ratings.leaderboard(limit, max(1, min_ratings))})
+
+
+@csrf_exempt
+@api_view(['POST'])
+@parser_classes([MultiPartParser])
+def import_users(request):
+    # multipart upload: file=<CSV or NDJSON>, role=donor|recipient|ngo
+    role = request.data.get('role')
+    upload = request.FILES.get('file')
+    if role not in services.USER_SERIALIZERS:
+        return Response({'error': f"role must be one of: {', '.join(sorted(services.USER_SERIALIZERS))}"}, status=400)
+    if upload is None:
+        return Response({'error': 'file is required'}, status=400)
+    fmt = request.data.get('format') or importer.detect_format(upload.name)
+    stream = io.TextIOWrapper(upload.file, encoding='utf-8', newline='')
+    # The process pool is for the management command, not a web worker
+    report = importer.UserImporter(role, workers=settings.IMPORT_HTTP_WORKERS).run(stream, fmt)
+    return Response(report.as_dict(), status=400 if report.failed and not report.created else 201)
+
+
+@api_view(['GET'])
+@replica_reads
 def donor_detail(request, donor_id):
     try:
-        donor = Donor.objects.get(donor_id=donor_id)
-        serializer = DonorSerializer(donor)
-        return Response(serializer.data)
-    except Donor.DoesNotExist:
-        return Response({'error': 'Donor not found'}, status=404)
+        return response_cache.respond(request, 'donor', donor_id, lambda: services.get_profile('donor', donor_id))
+    except services.ServiceError as e:
+        return Response(e.errors, status=e.status)
 
 
 @api_view(['GET'])
+@replica_reads
 def recipient_detail(request, recipient_id):
     try:
-        recipient = Recipient.objects.get(recipient_id=recipient_id)
-        serializer = RecipientSerializer(recipient)
-        return Response(serializer.data)
-    except Recipient.DoesNotExist:
-        return Response({'error': 'Recipient not found'}, status=404)
+        return response_cache.respond(
+            request, 'recipient', recipient_id, lambda: services.get_profile('recipient', recipient_id),
+        )
+    except services.ServiceError as e:
+        return Response(e.errors, status=e.status)
 
 
 @api_view(['GET'])
+@replica_reads
 def ngo_detail(request, ngo_id):
     try:
-        ngo = NGO.objects.get(ngo_id=ngo_id)
-        serializer = NGOSerializer(ngo)
-        return Response(serializer.data)
-    except NGO.DoesNotExist:
-        return Response({'error': 'NGO not found'}, status=404)
+        return response_cache.respond(request, 'ngo', ngo_id, lambda: services.get_profile('ngo', ngo_id))
+    except services.ServiceError as e:
+        return Response(e.errors, status=e.status)
 
 
 @csrf_exempt
 @api_view(['POST'])
 def match_donation(request):
-    # naive matching by city: assign an NGO in same city as donor if available
+    # match a single donation to the least-loaded NGO in the donor's city
     donation_id = request.data.get('donation_id')
     try:
         donation = Donation.objects.select_related('donor').get(donation_id=donation_id)
     except Donation.DoesNotExist:
         return Response({'error': 'donation not found'}, status=404)
-    ngo = NGO.objects.filter(city=donation.donor.city).first()
-    if ngo:
-        donation.ngo = ngo
-        donation.status = 'matched'
-        donation.save()
-        return Response({'matched': True, 'ngo_id': ngo.ngo_id})
-    return Response({'matched': False})
\ No newline at end of file
+    ngo_id = matching.match_one(donation)
+    if ngo_id:
+        return Response({'matched': True, 'ngo_id': ngo_id})
+    return Response({'matched': False})
+
+
+@csrf_exempt
+@api_view(['POST'])
+def match_donations_batch(request):
+    # match every pending donation in one pass and report throughput
+    strategy = request.data.get('strategy', matching.DEFAULT_STRATEGY)
+    if strategy not in matching.STRATEGIES:
+        return Response({'error': f"Unknown strategy '{strategy}'", 'strategies': sorted(matching.STRATEGIES)}, status=400)
+    report = matching.match_pending(strategy=strategy)
+    return Response(report.as_dict())
+
+
+@csrf_exempt
+@api_view(['GET', 'POST'])
+@replica_reads
+def allocation_requests_list_create(request):
+    if request.method == 'GET':
+        paginator = KeysetPaginator(request, 'request_id')
+        items = AllocationRequest.objects.all()
+        if request.query_params.get('status'):
+            items = items.filter(status=request.query_params['status'])
+        items = paginator.paginate(items)
+        return Response(paginator.get_paginated_data(AllocationRequestSerializer(items, many=True).data))
+    serializer = AllocationRequestSerializer(data=request.data)
+    if serializer.is_valid():
+        serializer.save()
+        return Response(serializer.data, status=201)
+    return Response(serializer.errors, status=400)
+
+
+@api_view(['GET'])
+@replica_reads
+def matches_list(request):
+    paginator = KeysetPaginator(request, 'donation_id')
+    items = paginator.paginate(Match.objects.all())
+    return Response(paginator.get_paginated_data(MatchSerializer(items, many=True).data))
+
+
+@csrf_exempt
+@api_view(['POST'])
+def run_allocation(request):
+    # allocate delivered donations to the highest-priority queued recipients
+    time_budget = request.data.get('time_budget')
+    try:
+        time_budget = float(time_budget) if time_budget is not None else None
+    except (TypeError, ValueError):
+        return Response({'error': 'time_budget must be a number of seconds'}, status=400)
+    report = allocation.allocate(time_budget=time_budget)
+    return Response(report.as_dict())
+
+
+def _export_response(request, resource, queryset):
+    fmt = request.GET.get('format', 'ndjson')
+    if fmt not in exports.FORMATS:
+        return JsonResponse({'error': f"Unsupported format '{fmt}', use one of: {', '.join(exports.FORMATS)}"}, status=400)
+    if resource != 'donations' and request.GET.get('city'):
+        queryset = queryset.filter(city=request.GET['city'])
+    response = StreamingHttpResponse(exports.stream_export(resource, queryset, fmt), content_type=exports.FORMATS[fmt])
+    response['Content-Disposition'] = f'attachment; filename="{resource}.{fmt}"'
+    return response
+
+
+# Exports are plain Django views: DRF would treat ?format= as renderer negotiation
+@require_GET
+def donations_export(request):
+    try:
+        items = filter_donations(Donation.objects.all(), request.GET)
+    except FilterError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    return _export_response(request, 'donations', items)
+
+
+@require_GET
+def donors_export(request):
+    return _export_response(request, 'donors', Donor.objects.all())
+
+
+@require_GET
+def recipients_export(request):
+    return _export_response(request, 'recipients', Recipient.objects.all())
+
+
+@require_GET
+def ngos_export(request):
+    return _export_response(request, 'ngos', NGO.objects.all())
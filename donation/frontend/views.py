@@ -1,3 +1,4 @@
+from asgiref.sync import sync_to_async
 from django.shortcuts import render, redirect
 from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_protect
@@ -5,10 +6,11 @@ from django.views.decorators.http import require_http_methods
 from django.conf import settings
 from django.utils.decorators import method_decorator
 from django.contrib.auth import authenticate, login
-from django.db import connection, transaction, IntegrityError
+from django.db import connection, connections, transaction, IntegrityError
 from .forms import DonationForm
+from api import services, throttling
+from project.db_routers import pin_to_primary, read_alias, replica_reads
 import json
-import requests
 import logging
 
 # Set up logging
@@ -17,7 +19,8 @@ logger = logging.getLogger(__name__)
 
 def run_select(sql, params=None):
     """Helper function to execute SELECT queries and return results"""
-    with connection.cursor() as cursor:
+    # On a read replica inside replica_reads views (see project/db_routers.py)
+    with connections[read_alias()].cursor() as cursor:
         cursor.execute(sql, params or {})
         columns = [col[0] for col in cursor.description]
         rows = cursor.fetchall()
@@ -30,65 +33,48 @@ def home(request):
     return render(request, 'home.html')
 
 
+# Login form role -> Credential role (also the session user_type and dashboard URL name)
+LOGIN_ROLES = {'donor': 'donor', 'recipient': 'recipient', 'ngo_admin': 'ngo'}
+
+
+def _login_throttled(request, retry_after):
+    response = render(request, 'login.html', {'error': 'Too many login attempts. Please try again shortly.'}, status=429)
+    response['Retry-After'] = str(retry_after)
+    return response
+
+
 def login_page(request):
     if request.method == 'POST':
         email = request.POST.get('email')
         password = request.POST.get('password')
-        role = request.POST.get('role', 'donor')
-        
+        # Role is optional: without it the email alone identifies the account
+        role = request.POST.get('role') or None
+
         try:
-            if role == 'donor':
-                # Authenticate donor
-                from api.models import Donor
-                try:
-                    donor = Donor.objects.get(email=email)
-                    if donor.check_password(password):
-                        # Store donor ID in session
-                        request.session['user_id'] = donor.donor_id
-                        request.session['user_type'] = 'donor'
-                        return redirect('donor')
-                    else:
-                        return render(request, 'login.html', {'error': 'Invalid email or password'})
-                except Donor.DoesNotExist:
-                    return render(request, 'login.html', {'error': 'Invalid email or password'})
-            
-            elif role == 'recipient':
-                # Authenticate recipient
-                from api.models import Recipient
-                try:
-                    recipient = Recipient.objects.get(email=email)
-                    if recipient.check_password(password):
-                        # Store recipient ID in session
-                        request.session['user_id'] = recipient.recipient_id
-                        request.session['user_type'] = 'recipient'
-                        return redirect('recipient')
-                    else:
-                        return render(request, 'login.html', {'error': 'Invalid email or password'})
-                except Recipient.DoesNotExist:
-                    return render(request, 'login.html', {'error': 'Invalid email or password'})
-            
-            elif role == 'ngo_admin':
-                # Authenticate NGO
-                from api.models import NGO
-                try:
-                    ngo = NGO.objects.get(email=email)
-                    if ngo.check_password(password):
-                        # Store NGO ID in session
-                        request.session['user_id'] = ngo.ngo_id
-                        request.session['user_type'] = 'ngo'
-                        return redirect('ngo')
-                    else:
-                        return render(request, 'login.html', {'error': 'Invalid email or password'})
-                except NGO.DoesNotExist:
-                    return render(request, 'login.html', {'error': 'Invalid email or password'})
-            
-            else:
+            if role is not None and role not in LOGIN_ROLES:
                 return render(request, 'login.html', {'error': 'Invalid user role'})
-                
+
+            retry_after = throttling.check_login(request.META.get('REMOTE_ADDR', ''), email)
+            if retry_after is not None:
+                return _login_throttled(request, retry_after)
+
+            # One indexed lookup in the unified credential table instead of one per role table
+            from api.credentials import authenticate as authenticate_credential
+            credential = authenticate_credential(email, password, LOGIN_ROLES.get(role))
+            if credential is None:
+                throttling.login_failed(email)
+                return render(request, 'login.html', {'error': 'Invalid email or password'})
+
+            request.session['user_id'] = credential.user_id
+            request.session['user_type'] = credential.role
+            return redirect(credential.role)
+
+        except throttling.HashPoolBusy:
+            return _login_throttled(request, 1)
         except Exception as e:
             logger.error(f"Exception in user login: {str(e)}")
             return render(request, 'login.html', {'error': f"Login failed: {str(e)}"})
-    
+
     return render(request, 'login.html')
 
 
@@ -122,20 +108,16 @@ def register_page(request):
                 
                 logger.info(f"Attempting to create donor with data: {donor_data}")
                 
-                # Make API call to create donor
-                api_url = "http://127.0.0.1:8000/api/donors/"
-                response = requests.post(api_url, json=donor_data)
-                
-                logger.info(f"API response status: {response.status_code}")
-                logger.info(f"API response text: {response.text}")
-                
-                if response.status_code == 200 or response.status_code == 201:
-                    logger.info("Donor created successfully, redirecting to login")
-                    return redirect('login')
-                else:
-                    error_msg = response.text
+                # Create donor in-process through the shared service layer
+                try:
+                    services.create_user('donor', donor_data)
+                except services.ServiceError as e:
+                    error_msg = json.dumps(e.errors)
                     logger.error(f"API Error: {error_msg}")
                     return render(request, 'register.html', {'error': f"API Error: {error_msg}"})
+
+                logger.info("Donor created successfully, redirecting to login")
+                return redirect('login')
             
             elif role == 'recipient':
                 # Handle recipient registration
@@ -154,20 +136,16 @@ def register_page(request):
                 
                 logger.info(f"Attempting to create recipient with data: {recipient_data}")
                 
-                # Make API call to create recipient
-                api_url = "http://127.0.0.1:8000/api/recipients/"
-                response = requests.post(api_url, json=recipient_data)
-                
-                logger.info(f"API response status: {response.status_code}")
-                logger.info(f"API response text: {response.text}")
-                
-                if response.status_code == 200 or response.status_code == 201:
-                    logger.info("Recipient created successfully, redirecting to login")
-                    return redirect('login')
-                else:
-                    error_msg = response.text
+                # Create recipient in-process through the shared service layer
+                try:
+                    services.create_user('recipient', recipient_data)
+                except services.ServiceError as e:
+                    error_msg = json.dumps(e.errors)
                     logger.error(f"API Error: {error_msg}")
                     return render(request, 'register.html', {'error': f"API Error: {error_msg}"})
+
+                logger.info("Recipient created successfully, redirecting to login")
+                return redirect('login')
             
             elif role == 'ngo_admin':
                 # Handle NGO registration
@@ -185,20 +163,16 @@ def register_page(request):
                 
                 logger.info(f"Attempting to create NGO with data: {ngo_data}")
                 
-                # Make API call to create NGO
-                api_url = "http://127.0.0.1:8000/api/ngos/"
-                response = requests.post(api_url, json=ngo_data)
-                
-                logger.info(f"API response status: {response.status_code}")
-                logger.info(f"API response text: {response.text}")
-                
-                if response.status_code == 200 or response.status_code == 201:
-                    logger.info("NGO created successfully, redirecting to login")
-                    return redirect('login')
-                else:
-                    error_msg = response.text
+                # Create NGO in-process through the shared service layer
+                try:
+                    services.create_user('ngo', ngo_data)
+                except services.ServiceError as e:
+                    error_msg = json.dumps(e.errors)
                     logger.error(f"API Error: {error_msg}")
                     return render(request, 'register.html', {'error': f"API Error: {error_msg}"})
+
+                logger.info("NGO created successfully, redirecting to login")
+                return redirect('login')
             
             else:
                 return render(request, 'register.html', {'error': 'Invalid user role'})
@@ -210,6 +184,31 @@ def register_page(request):
     return render(request, 'register.html')
 
 
+# KPIs come from the incrementally maintained api_donorstats rollup (see api/stats.py):
+# a single primary-key lookup instead of aggregating all of the donor's donations
+DONOR_KPI_SQL = """
+        SELECT 
+            total_donations,
+            total_items,
+            delivered_count,
+            pending_count,
+            CASE WHEN rating_count > 0 THEN rating_sum * 1.0 / rating_count END AS avg_rating
+        FROM api_donorstats
+        WHERE donor_id = %(donor_id)s
+        """
+
+
+def empty_kpis():
+    return {
+        'total_donations': 0,
+        'total_items': 0,
+        'delivered_count': 0,
+        'pending_count': 0,
+        'avg_rating': None
+    }
+
+
+@replica_reads
 def donor_dashboard(request):
     # Check if user is logged in and is a donor
     user_id = request.session.get('user_id')
@@ -232,20 +231,17 @@ def donor_dashboard(request):
             
             logger.info(f"Attempting to create donation with data: {donation_data}")
             
-            # Make API call to create donation
-            api_url = "http://127.0.0.1:8000/api/donations/"
-            response = requests.post(api_url, json=donation_data)
-            
-            logger.info(f"API response status: {response.status_code}")
-            logger.info(f"API response text: {response.text}")
-            
-            if response.status_code == 200 or response.status_code == 201:
-                logger.info("Donation created successfully")
-                return JsonResponse({'success': True})
-            else:
-                error_msg = response.text
+            # Submit donation in-process through the shared service layer
+            try:
+                services.submit_donation(donation_data)
+            except services.ServiceError as e:
+                error_msg = json.dumps(e.errors)
                 logger.error(f"API Error: {error_msg}")
                 return JsonResponse({'success': False, 'error': f"API Error: {error_msg}"})
+
+            pin_to_primary(request)
+            logger.info("Donation created successfully")
+            return JsonResponse({'success': True})
         except Exception as e:
             logger.error(f"Exception in donation submission: {str(e)}")
             return JsonResponse({'success': False, 'error': f"Exception: {str(e)}"})
@@ -255,75 +251,51 @@ def donor_dashboard(request):
         # Calculate KPIs using SQL
         donor_id = user_id
         
-        kpi_sql = """
-        SELECT 
-            COUNT(*) AS total_donations,
-            COALESCE(SUM(quantity), 0) AS total_items,
-            SUM(CASE WHEN status='delivered' THEN 1 ELSE 0 END) AS delivered_count,
-            SUM(CASE WHEN status='pending' THEN 1 ELSE 0 END) AS pending_count,
-            (SELECT AVG(f.rating)
-             FROM api_feedback f
-             JOIN api_donation d2 ON d2.donation_id = f.match_id
-             WHERE d2.donor_id = %(donor_id)s) AS avg_rating
-        FROM api_donation
-        WHERE donor_id = %(donor_id)s
-        """
-        
+        kpi_sql = DONOR_KPI_SQL
         kpis_result = run_select(kpi_sql, {'donor_id': donor_id})
-        kpis = kpis_result['rows'][0] if kpis_result['rows'] else {
-            'total_donations': 0,
-            'total_items': 0,
-            'delivered_count': 0,
-            'pending_count': 0,
-            'avg_rating': None
-        }
+        kpis = kpis_result['rows'][0] if kpis_result['rows'] else empty_kpis()
         
-        # Fetch donor details from API
-        api_url = f"http://127.0.0.1:8000/api/donors/{user_id}/"
-        response = requests.get(api_url)
-        
-        if response.status_code == 200:
-            donor_data = response.json()
-            context = {
-                'donor': donor_data,
-                'kpis': kpis,
-                'kpi_sql': kpi_sql,
-                'kpi_params': {'donor_id': donor_id}
-            }
-        else:
-            # Fallback to database if API fails
-            from api.models import Donor
-            donor = Donor.objects.get(donor_id=user_id)
-            context = {
-                'donor': {
-                    'donor_id': donor.donor_id,
-                    'name': donor.name,
-                    'email': donor.email,
-                    'phone': donor.phone,
-                    'address': donor.address,
-                    'city': donor.city,
-                    'state': donor.state,
-                    'pincode': donor.pincode
-                },
-                'kpis': kpis,
-                'kpi_sql': kpi_sql,
-                'kpi_params': {'donor_id': donor_id}
-            }
+        # Fetch donor details through the shared service layer
+        context = {
+            'donor': services.get_profile('donor', user_id),
+            'kpis': kpis,
+            'kpi_sql': kpi_sql,
+            'kpi_params': {'donor_id': donor_id}
+        }
     except Exception as e:
         logger.error(f"Error fetching donor information or KPIs: {str(e)}")
+        context = {'kpis': empty_kpis()}
+    
+    return render(request, 'donor_dashboard.html', context)
+
+
+@replica_reads
+async def adonor_dashboard(request):
+    """donor_dashboard on the async ORM (ASGI); POSTs go to the sync view."""
+    if request.method != 'GET':
+        return await sync_to_async(donor_dashboard)(request)
+
+    user_id = await request.session.aget('user_id')
+    user_type = await request.session.aget('user_type')
+    if not user_id or user_type != 'donor':
+        return redirect('login')
+
+    try:
+        kpis_result = await sync_to_async(run_select)(DONOR_KPI_SQL, {'donor_id': user_id})
         context = {
-            'kpis': {
-                'total_donations': 0,
-                'total_items': 0,
-                'delivered_count': 0,
-                'pending_count': 0,
-                'avg_rating': None
-            }
+            'donor': await services.aget_profile('donor', user_id),
+            'kpis': kpis_result['rows'][0] if kpis_result['rows'] else empty_kpis(),
+            'kpi_sql': DONOR_KPI_SQL,
+            'kpi_params': {'donor_id': user_id}
         }
-    
+    except Exception as e:
+        logger.error(f"Error fetching donor information or KPIs: {str(e)}")
+        context = {'kpis': empty_kpis()}
+
     return render(request, 'donor_dashboard.html', context)
 
 
+@replica_reads
 def recipient_dashboard(request):
     # Check if user is logged in and is a recipient
     user_id = request.session.get('user_id')
@@ -334,31 +306,8 @@ def recipient_dashboard(request):
     
     # GET request - display recipient dashboard with recipient information
     try:
-        # Fetch recipient details from API
-        api_url = f"http://127.0.0.1:8000/api/recipients/{user_id}/"
-        response = requests.get(api_url)
-        
-        if response.status_code == 200:
-            recipient_data = response.json()
-            context = {'recipient': recipient_data}
-        else:
-            # Fallback to database if API fails
-            from api.models import Recipient
-            recipient = Recipient.objects.get(recipient_id=user_id)
-            context = {
-                'recipient': {
-                    'recipient_id': recipient.recipient_id,
-                    'name': recipient.name,
-                    'email': recipient.email,
-                    'phone': recipient.phone,
-                    'family_size': recipient.family_size,
-                    'urgency': recipient.urgency,
-                    'address': recipient.address,
-                    'city': recipient.city,
-                    'state': recipient.state,
-                    'pincode': recipient.pincode
-                }
-            }
+        # Fetch recipient details through the shared service layer
+        context = {'recipient': services.get_profile('recipient', user_id)}
     except Exception as e:
         logger.error(f"Error fetching recipient information: {str(e)}")
         context = {}
@@ -366,6 +315,7 @@ def recipient_dashboard(request):
     return render(request, 'recipient_dashboard.html', context)
 
 
+@replica_reads
 def ngo_dashboard(request):
     # Check if user is logged in and is an NGO
     user_id = request.session.get('user_id')
@@ -376,30 +326,8 @@ def ngo_dashboard(request):
     
     # GET request - display NGO dashboard with NGO information
     try:
-        # Fetch NGO details from API
-        api_url = f"http://127.0.0.1:8000/api/ngos/{user_id}/"
-        response = requests.get(api_url)
-        
-        if response.status_code == 200:
-            ngo_data = response.json()
-            context = {'ngo': ngo_data}
-        else:
-            # Fallback to database if API fails
-            from api.models import NGO
-            ngo = NGO.objects.get(ngo_id=user_id)
-            context = {
-                'ngo': {
-                    'ngo_id': ngo.ngo_id,
-                    'ngo_name': ngo.ngo_name,
-                    'email': ngo.email,
-                    'phone': ngo.phone,
-                    'website': ngo.website,
-                    'address': ngo.address,
-                    'city': ngo.city,
-                    'state': ngo.state,
-                    'pincode': ngo.pincode
-                }
-            }
+        # Fetch NGO details through the shared service layer
+        context = {'ngo': services.get_profile('ngo', user_id)}
     except Exception as e:
         logger.error(f"Error fetching NGO information: {str(e)}")
         context = {}
@@ -420,22 +348,24 @@ def create_donation(request):
         if form.is_valid():
             # Get donor information for city-based NGO assignment
             try:
-                from api.models import Donor, NGO
+                from api.models import Donor
+                from api import ngo_index
                 donor = Donor.objects.get(donor_id=user_id)
                 donor_city = donor.city
                 
                 # Option 1: Using Django ORM with transaction
                 try:
+                    # Auto-assign NGO by city from the cached city -> NGO index (no query)
+                    ngo_id = ngo_index.first_ngo_in(donor_city)
                     with transaction.atomic():
-                        # Auto-assign NGO by city
-                        ngo = NGO.objects.filter(city=donor_city).first()
-                        
                         donation = form.save(commit=False)
                         donation.donor_id = user_id
-                        donation.ngo = ngo
+                        donation.ngo_id = ngo_id
                         donation.status = 'pending'
                         donation.save()
-                        
+                    # Show this donor their new donation even before replicas catch up
+                    pin_to_primary(request)
+
                     return render(request, 'create_donation.html', {
                         'form': DonationForm(),  # Reset form
                         'success': 'Donation submitted successfully!',
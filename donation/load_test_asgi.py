@@ -0,0 +1,146 @@
+"""
+Concurrent-connection load test for comparing the WSGI and ASGI deployments.
+
+Start the same app both ways with the same number of worker processes (same
+memory budget), for example:
+
+    gunicorn project.wsgi -w 2 --threads 8 -b 127.0.0.1:8000
+    uvicorn project.asgi:application --workers 2 --port 8001
+
+then run this script against each one:
+
+    python load_test_asgi.py http://127.0.0.1:8000 --pid <gunicorn master pid>
+    python load_test_asgi.py http://127.0.0.1:8001 --pid <uvicorn master pid>
+
+At each concurrency level, that many keep-alive connections request the paths
+in a loop for --duration seconds. The script prints throughput, latency
+percentiles, errors (timeouts and non-2xx/3xx responses) and the server's
+resident memory: the RSS of --pid and its child processes, read from /proc.
+Stdlib only.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+from urllib.parse import urlsplit
+
+
+def rss_mb(pid):
+    """Resident memory of a process and its children in MB (Linux), or None."""
+    if not pid:
+        return None
+    pids = {pid}
+    for entry in os.listdir('/proc'):
+        if entry.isdigit():
+            try:
+                with open(f'/proc/{entry}/stat') as fh:
+                    if int(fh.read().rsplit(')', 1)[1].split()[1]) == pid:
+                        pids.add(int(entry))
+            except (OSError, IndexError, ValueError):
+                continue
+    total_kb = 0
+    for p in pids:
+        try:
+            with open(f'/proc/{p}/status') as fh:
+                total_kb += next(int(line.split()[1]) for line in fh if line.startswith('VmRSS:'))
+        except (OSError, StopIteration):
+            continue
+    return total_kb / 1024
+
+
+async def fetch(reader, writer, host, path, cookie):
+    headers = f'GET {path} HTTP/1.1\r\nHost: {host}\r\nConnection: keep-alive\r\n'
+    if cookie:
+        headers += f'Cookie: {cookie}\r\n'
+    writer.write((headers + '\r\n').encode())
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length, chunked = None, False
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        if name.lower() == 'content-length':
+            length = int(value)
+        elif name.lower() == 'transfer-encoding' and 'chunked' in value.lower():
+            chunked = True
+    if chunked:
+        while True:
+            size = int((await reader.readline()).split(b';')[0], 16)
+            await reader.readexactly(size + 2)
+            if size == 0:
+                break
+    elif length is not None:
+        await reader.readexactly(length)
+    else:
+        await reader.read()
+        return status, False
+    return status, True
+
+
+async def connection_loop(url, paths, cookie, deadline, timeout, results):
+    parts = urlsplit(url)
+    host, port = parts.hostname, parts.port or 80
+    reader = writer = None
+    i = 0
+    while time.perf_counter() < deadline:
+        path = paths[i % len(paths)]
+        i += 1
+        started = time.perf_counter()
+        try:
+            if writer is None:
+                reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+            status, keep_alive = await asyncio.wait_for(fetch(reader, writer, parts.netloc, path, cookie), timeout)
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError, IndexError):
+            results['errors'] += 1
+            if writer is not None:
+                writer.close()
+            writer = None
+            await asyncio.sleep(0.05)
+            continue
+        if status >= 400:
+            results['errors'] += 1
+        else:
+            results['latencies'].append((time.perf_counter() - started) * 1000)
+        if not keep_alive:
+            writer.close()
+            writer = None
+    if writer is not None:
+        writer.close()
+
+
+async def run_level(url, paths, cookie, connections, duration, timeout):
+    results = {'latencies': [], 'errors': 0}
+    deadline = time.perf_counter() + duration
+    await asyncio.gather(*(connection_loop(url, paths, cookie, deadline, timeout, results)
+                           for _ in range(connections)))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('url', help='Server base URL, e.g. http://127.0.0.1:8000')
+    parser.add_argument('--paths', nargs='+', default=['/api/health/', '/api/donations/', '/api/donors/1/'])
+    parser.add_argument('--connections', type=int, nargs='+', default=[10, 50, 100, 200, 400])
+    parser.add_argument('--duration', type=float, default=10.0, help='Seconds per concurrency level')
+    parser.add_argument('--timeout', type=float, default=10.0, help='Per-request timeout in seconds')
+    parser.add_argument('--cookie', help='Cookie header, e.g. sessionid=... to load /donor/')
+    parser.add_argument('--pid', type=int, help='Server master process id, for memory readings')
+    args = parser.parse_args()
+
+    print(f"=== Load test {args.url} {' '.join(args.paths)} ===")
+    print(f"{'conns':>6} {'req/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'errors':>7} {'RSS MB':>8}")
+    for connections in args.connections:
+        results = asyncio.run(run_level(args.url, args.paths, args.cookie, connections, args.duration, args.timeout))
+        latencies = sorted(results['latencies'])
+        p50 = statistics.median(latencies) if latencies else float('nan')
+        p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] if latencies else float('nan')
+        memory = rss_mb(args.pid)
+        print(f"{connections:>6} {len(latencies) / args.duration:>9.1f} {p50:>9.2f} {p99:>9.2f} "
+              f"{results['errors']:>7} {memory if memory is not None else float('nan'):>8.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,8 @@
+import os
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'project.settings')
+# Serve the hot read endpoints with their async views (see api/async_views.py)
+os.environ.setdefault('ASYNC_VIEWS', '1')
+
+application = get_asgi_application()
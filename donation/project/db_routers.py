@@ -0,0 +1,111 @@
+"""
+Read-replica routing.
+
+Writes always go to ``default``. Reads go to a replica only inside a view
+wrapped with ``replica_reads``, which covers the GET and HEAD requests of
+read-only views. Everything else, including reads that must see a write
+made earlier in the same request, stays on the primary.
+
+Read-your-writes: after a session writes something its next page must show,
+``pin_to_primary(request)`` keeps that session's reads on the primary for
+REPLICA_PIN_SECONDS, which should exceed the expected replication lag.
+"""
+import asyncio
+import contextlib
+import contextvars
+import functools
+import random
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+from api import metrics
+
+PIN_SESSION_KEY = 'db_pinned_until'
+
+# Alias reads are routed to in the current request; None leaves them on default
+_read_alias = contextvars.ContextVar('read_alias', default=None)
+
+
+def read_alias():
+    """Alias for raw SQL reads (run_select, cursor queries) in the current context."""
+    return _read_alias.get() or DEFAULT_DB_ALIAS
+
+
+@contextlib.contextmanager
+def primary_reads():
+    """Keep the reads made inside the block on the primary, even in a replica_reads view."""
+    token = _read_alias.set(None)
+    try:
+        yield
+    finally:
+        _read_alias.reset(token)
+
+
+def pin_to_primary(request):
+    request.session[PIN_SESSION_KEY] = time.time() + settings.REPLICA_PIN_SECONDS
+
+
+def _is_pinned(request):
+    session = getattr(request, 'session', None)
+    # Loading the session here also keeps the session row itself read from the primary
+    return session is not None and session.get(PIN_SESSION_KEY, 0) > time.time()
+
+
+def _choose_alias(request):
+    """Replica alias for this request's reads, or None to stay on the primary."""
+    if not settings.DATABASE_REPLICAS or request.method not in ('GET', 'HEAD'):
+        return None
+    if _is_pinned(request):
+        metrics.incr('db.pinned_reads')
+        return None
+    metrics.incr('db.replica_reads')
+    return random.choice(settings.DATABASE_REPLICAS)
+
+
+def replica_reads(view):
+    """Route the ORM and ``read_alias()`` reads of GET/HEAD requests to a replica."""
+    if asyncio.iscoroutinefunction(view):
+        @functools.wraps(view)
+        async def async_wrapper(request, *args, **kwargs):
+            alias = await sync_to_async(_choose_alias)(request)
+            if alias is None:
+                return await view(request, *args, **kwargs)
+            # sync_to_async copies the context, so ORM calls made from the view see the alias
+            token = _read_alias.set(alias)
+            try:
+                return await view(request, *args, **kwargs)
+            finally:
+                _read_alias.reset(token)
+        return async_wrapper
+
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        alias = _choose_alias(request)
+        if alias is None:
+            return view(request, *args, **kwargs)
+        token = _read_alias.set(alias)
+        try:
+            return view(request, *args, **kwargs)
+        finally:
+            _read_alias.reset(token)
+    return wrapper
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        return _read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        # Explicit, so that saving an instance read from a replica still writes to the primary
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get their schema through replication
+        return db not in settings.DATABASE_REPLICAS
@@ -0,0 +1,8 @@
+"""
+MySQL database backend with a bounded, process-wide connection pool.
+
+Selected by settings when MYSQL_POOL_SIZE > 0. Connections that Django closes
+at the end of a request go back to the pool instead of being torn down, so the
+next request skips connect and auth. The pool is shared by every thread of the
+process, including the threads that async views use to run ORM calls.
+"""
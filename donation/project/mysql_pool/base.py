@@ -0,0 +1,44 @@
+import threading
+
+from django.db.backends.mysql import base as mysql_base
+
+from .pool import ConnectionPool, PoolTimeout
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(alias, settings_dict):
+    """The process-wide pool for a database alias, created on first use from its POOL settings."""
+    with _pools_lock:
+        if alias not in _pools:
+            _pools[alias] = ConnectionPool(**settings_dict.get('POOL', {}))
+        return _pools[alias]
+
+
+class DatabaseWrapper(mysql_base.DatabaseWrapper):
+    @property
+    def pool(self):
+        return get_pool(self.alias, self.settings_dict)
+
+    def get_new_connection(self, conn_params):
+        try:
+            return self.pool.acquire(lambda: super(DatabaseWrapper, self).get_new_connection(conn_params))
+        except PoolTimeout as exc:
+            # Surfaces as django.db.OperationalError through wrap_database_errors
+            raise self.Database.OperationalError(str(exc)) from exc
+
+    def _close(self):
+        if self.connection is None:
+            return
+        # Closed inside atomic(): Django keeps referencing the connection, so it must not be shared
+        reusable = not self.in_atomic_block
+        try:
+            # Never hand the next user an open transaction
+            if reusable and not self.autocommit:
+                self.connection.rollback()
+            if reusable and self.errors_occurred:
+                reusable = self.is_usable()
+        except self.Database.Error:
+            reusable = False
+        self.pool.release(self.connection, reusable)
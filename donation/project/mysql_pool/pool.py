@@ -0,0 +1,91 @@
+import collections
+import threading
+import time
+
+
+class PoolTimeout(Exception):
+    """No connection became available within the pool timeout."""
+
+
+class ConnectionPool:
+    """At most ``size`` DB-API connections checked out at once; idle ones are reused LIFO.
+
+    An idle connection older than ``max_lifetime`` seconds is replaced. One idle
+    for longer than ``ping_after`` seconds is pinged before reuse, and replaced
+    if the ping fails.
+    """
+
+    def __init__(self, size, timeout=5.0, max_lifetime=1800.0, ping_after=30.0):
+        self.size = size
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.ping_after = ping_after
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self._idle = collections.deque()
+        self._created = {}
+        self.stats = collections.Counter()
+
+    def acquire(self, connect):
+        """Return a pooled connection, or a new one from ``connect()``; wait up to ``timeout``."""
+        if not self._slots.acquire(timeout=self.timeout):
+            self.stats['timeouts'] += 1
+            raise PoolTimeout(f'No database connection available within {self.timeout}s (pool size {self.size})')
+        try:
+            while True:
+                with self._lock:
+                    idle = self._idle.pop() if self._idle else None
+                if idle is None:
+                    conn = connect()
+                    with self._lock:
+                        self._created[id(conn)] = time.monotonic()
+                    self.stats['connects'] += 1
+                    return conn
+                conn, returned_at = idle
+                now = time.monotonic()
+                if now - self._created.get(id(conn), now) > self.max_lifetime:
+                    self._discard(conn)
+                    self.stats['expired'] += 1
+                    continue
+                if now - returned_at > self.ping_after and not self._ping(conn):
+                    self._discard(conn)
+                    self.stats['failed_pings'] += 1
+                    continue
+                self.stats['reuses'] += 1
+                return conn
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def release(self, conn, reusable=True):
+        """Give a checked-out connection back; it is closed instead if not ``reusable``."""
+        try:
+            if reusable:
+                with self._lock:
+                    self._idle.append((conn, time.monotonic()))
+            else:
+                self._discard(conn)
+        finally:
+            self._slots.release()
+
+    def close_idle(self):
+        with self._lock:
+            idle, self._idle = list(self._idle), collections.deque()
+        for conn, _ in idle:
+            self._discard(conn)
+
+    @staticmethod
+    def _ping(conn):
+        try:
+            conn.ping()
+            return True
+        except Exception:
+            return False
+
+    def _discard(self, conn):
+        with self._lock:
+            self._created.pop(id(conn), None)
+        try:
+            conn.close()
+        except Exception:
+            pass
@@ -50,6 +50,7 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'project.wsgi.application'
+ASGI_APPLICATION = 'project.asgi.application'
 
 import os
 
@@ -61,9 +62,66 @@ DATABASES = {
         'PASSWORD': os.environ.get('MYSQL_PASSWORD', ''),
         'HOST': os.environ.get('MYSQL_HOST', 'localhost'),
         'PORT': os.environ.get('MYSQL_PORT', '3306'),
+        # Persistent connections: seconds to keep a connection across requests (0 = per request)
+        'CONN_MAX_AGE': int(os.environ.get('MYSQL_CONN_MAX_AGE', '0')),
+        'CONN_HEALTH_CHECKS': os.environ.get('MYSQL_CONN_HEALTH_CHECKS', '1') == '1',
     }
 }
 
+# Bounded connection pool shared by all threads of a worker (see project/mysql_pool).
+# Connections go back to the pool at the end of each request, so CONN_MAX_AGE stays 0.
+if int(os.environ.get('MYSQL_POOL_SIZE', '0')) > 0:
+    DATABASES['default'].update({
+        'ENGINE': 'project.mysql_pool',
+        'CONN_MAX_AGE': 0,
+        'POOL': {
+            'size': int(os.environ['MYSQL_POOL_SIZE']),
+            'timeout': float(os.environ.get('MYSQL_POOL_TIMEOUT', '5')),
+            'max_lifetime': float(os.environ.get('MYSQL_POOL_MAX_LIFETIME', '1800')),
+            'ping_after': float(os.environ.get('MYSQL_POOL_PING_AFTER', '30')),
+        },
+    })
+
+# DB_ENGINE=sqlite runs against a local SQLite file instead (tests, query-plan checks)
+if os.environ.get('DB_ENGINE', 'mysql') == 'sqlite':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('SQLITE_PATH', str(BASE_DIR / 'db.sqlite3')),
+        }
+    }
+
+# Read replicas (see project/db_routers.py): MYSQL_REPLICA_HOSTS is a comma-separated
+# list of hosts that share the primary's database settings. With DB_ENGINE=sqlite,
+# SQLITE_REPLICA_PATHS lists replica files instead (local testing).
+if DATABASES['default']['ENGINE'] == 'django.db.backends.sqlite3':
+    _replicas = [{'NAME': path} for path in os.environ.get('SQLITE_REPLICA_PATHS', '').split(',') if path]
+else:
+    _replicas = [{'HOST': host} for host in os.environ.get('MYSQL_REPLICA_HOSTS', '').split(',') if host]
+DATABASE_REPLICAS = []
+for _number, _replica in enumerate(_replicas, 1):
+    DATABASES[f'replica{_number}'] = {**DATABASES['default'], **_replica, 'TEST': {'MIRROR': 'default'}}
+    DATABASE_REPLICAS.append(f'replica{_number}')
+DATABASE_ROUTERS = ['project.db_routers.ReplicaRouter']
+# Seconds a session reads from the primary after it submits a donation (read-your-writes)
+REPLICA_PIN_SECONDS = int(os.environ.get('REPLICA_PIN_SECONDS', '10'))
+
+# Shared cache for cross-process state (NGO city index, ...). Set REDIS_URL in
+# multi-process deployments; the default local-memory cache is per process.
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
 AUTH_PASSWORD_VALIDATORS: list[dict] = []
 
 LANGUAGE_CODE = 'en-us'
@@ -78,3 +136,96 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 
+
+# Keyset pagination for the API list endpoints (see api/pagination.py)
+API_PAGE_SIZE = int(os.environ.get('API_PAGE_SIZE', '50'))
+API_MAX_PAGE_SIZE = int(os.environ.get('API_MAX_PAGE_SIZE', '500'))
+
+# Rows fetched per query by the streaming export endpoints (see api/exports.py)
+EXPORT_CHUNK_SIZE = int(os.environ.get('EXPORT_CHUNK_SIZE', '2000'))
+
+# Pending donations processed per bulk_update by the batch matcher (see api/matching.py)
+MATCH_BATCH_SIZE = int(os.environ.get('MATCH_BATCH_SIZE', '1000'))
+# Per-category intake assumed by the min_cost_flow matcher for NGOs without an NGOCapacity row
+MATCH_DEFAULT_NGO_CAPACITY = int(os.environ.get('MATCH_DEFAULT_NGO_CAPACITY', '100'))
+
+# Rows loaded/written per batch by the recipient allocation queue (see api/allocation.py)
+ALLOCATION_BATCH_SIZE = int(os.environ.get('ALLOCATION_BATCH_SIZE', '5000'))
+
+# POST /api/donations/bulk/ and /api/feedback/batch/ limits (see api/services.py)
+BULK_DONATION_MAX_ITEMS = int(os.environ.get('BULK_DONATION_MAX_ITEMS', '5000'))
+BULK_DONATION_BATCH_SIZE = int(os.environ.get('BULK_DONATION_BATCH_SIZE', '500'))
+BULK_FEEDBACK_MAX_ITEMS = int(os.environ.get('BULK_FEEDBACK_MAX_ITEMS', '5000'))
+
+# Bulk user import (manage.py import_users, POST /api/users/import/); 0 workers = all cores.
+# The HTTP endpoint runs inside a web worker, so it hashes with at most IMPORT_HTTP_WORKERS
+# processes (1 = no process pool).
+IMPORT_CHUNK_SIZE = int(os.environ.get('IMPORT_CHUNK_SIZE', '1000'))
+IMPORT_WORKERS = int(os.environ.get('IMPORT_WORKERS', '0'))
+IMPORT_HTTP_WORKERS = max(1, int(os.environ.get('IMPORT_HTTP_WORKERS', '1')))
+
+# Login throttling (see api/throttling.py): attempts per IP and failed attempts per
+# email within sliding windows (seconds). LOGIN_HASH_WORKERS > 0 verifies passwords
+# on a bounded pool of that many threads with LOGIN_HASH_QUEUE waiting slots.
+LOGIN_IP_LIMIT = int(os.environ.get('LOGIN_IP_LIMIT', '30'))
+LOGIN_IP_WINDOW = int(os.environ.get('LOGIN_IP_WINDOW', '60'))
+LOGIN_EMAIL_LIMIT = int(os.environ.get('LOGIN_EMAIL_LIMIT', '5'))
+LOGIN_EMAIL_WINDOW = int(os.environ.get('LOGIN_EMAIL_WINDOW', '300'))
+LOGIN_HASH_WORKERS = int(os.environ.get('LOGIN_HASH_WORKERS', '0'))
+LOGIN_HASH_QUEUE = int(os.environ.get('LOGIN_HASH_QUEUE', '8'))
+
+# Password hashing profile (see api/hashers.py): the profile's hasher creates new
+# hashes; the others still verify old ones, which are rehashed on the next
+# successful login. Compare candidates on this machine with manage.py bench_hashers.
+# The argon2 profile needs argon2-cffi. Work factors of 0 keep Django's defaults.
+PASSWORD_HASHER_PROFILES = {
+    'pbkdf2': 'api.hashers.TunedPBKDF2PasswordHasher',
+    'argon2': 'api.hashers.TunedArgon2PasswordHasher',
+    'scrypt': 'api.hashers.TunedScryptPasswordHasher',
+}
+PASSWORD_HASHER_PROFILE = os.environ.get('PASSWORD_HASHER_PROFILE', 'pbkdf2')
+PASSWORD_HASHERS = [PASSWORD_HASHER_PROFILES[PASSWORD_HASHER_PROFILE]] + [
+    hasher for profile, hasher in PASSWORD_HASHER_PROFILES.items() if profile != PASSWORD_HASHER_PROFILE
+] + [
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+]
+PBKDF2_ITERATIONS = int(os.environ.get('PBKDF2_ITERATIONS', '0'))
+ARGON2_TIME_COST = int(os.environ.get('ARGON2_TIME_COST', '0'))
+ARGON2_MEMORY_COST = int(os.environ.get('ARGON2_MEMORY_COST', '0'))  # KiB
+ARGON2_PARALLELISM = int(os.environ.get('ARGON2_PARALLELISM', '0'))
+SCRYPT_WORK_FACTOR = int(os.environ.get('SCRYPT_WORK_FACTOR', '0'))
+
+# Route health, list/detail endpoints and the donor dashboard to their async views.
+# project/asgi.py turns this on; under WSGI the sync views avoid a per-request event loop.
+ASYNC_VIEWS = os.environ.get('ASYNC_VIEWS', '0') == '1'
+
+# ETag / 304 for the detail and list endpoints (see api/response_cache.py). The version
+# tokens must be seen by every writer (web workers and management commands), so ETags
+# default to on only with REDIS_URL. Tokens expire after RESPONSE_CACHE_VERSION_TIMEOUT s.
+# With RESPONSE_CACHE_BYTES=1 rendered bodies are cached too, for up to RESPONSE_CACHE_TIMEOUT s.
+RESPONSE_CACHE_ETAGS = os.environ.get('RESPONSE_CACHE_ETAGS', '1' if os.environ.get('REDIS_URL') else '0') == '1'
+RESPONSE_CACHE_VERSION_TIMEOUT = int(os.environ.get('RESPONSE_CACHE_VERSION_TIMEOUT', '86400'))
+RESPONSE_CACHE_BYTES = os.environ.get('RESPONSE_CACHE_BYTES', '0') == '1'
+RESPONSE_CACHE_TIMEOUT = int(os.environ.get('RESPONSE_CACHE_TIMEOUT', '300'))
+
+# Superadmin analytics (see api/analytics.py): the dashboard payload is built from
+# precomputed counters and cached for up to ANALYTICS_MAX_AGE seconds (?refresh=1
+# rebuilds it). It lists the top ANALYTICS_TOP_CITIES recipient cities and the
+# donations of the last ANALYTICS_DAYS days.
+ANALYTICS_MAX_AGE = int(os.environ.get('ANALYTICS_MAX_AGE', '60'))
+ANALYTICS_TOP_CITIES = int(os.environ.get('ANALYTICS_TOP_CITIES', '5'))
+ANALYTICS_DAYS = int(os.environ.get('ANALYTICS_DAYS', '30'))
+
+# Donation trend series (see api/trends.py): buckets returned when no start is given,
+# and the most a single request may ask for.
+DONATION_SERIES_DEFAULT_POINTS = int(os.environ.get('DONATION_SERIES_DEFAULT_POINTS', '30'))
+DONATION_SERIES_MAX_POINTS = int(os.environ.get('DONATION_SERIES_MAX_POINTS', '1000'))
+
+# NGO leaderboard (see api/ratings.py): ratings are averaged as if every NGO also had
+# RATING_PRIOR_WEIGHT ratings of RATING_PRIOR_MEAN, so a few 5-star ratings do not
+# outrank a long record. The average is stored, so run manage.py rebuild_ratings
+# after changing either. LEADERBOARD_MAX_LIMIT caps ?limit=.
+RATING_PRIOR_MEAN = float(os.environ.get('RATING_PRIOR_MEAN', '3.0'))
+RATING_PRIOR_WEIGHT = int(os.environ.get('RATING_PRIOR_WEIGHT', '5'))
+LEADERBOARD_MAX_LIMIT = int(os.environ.get('LEADERBOARD_MAX_LIMIT', '100'))
@@ -0,0 +1,214 @@
+"""
+Query-plan regression suite for the hot queries.
+
+Builds a throwaway test database from the current models (including Meta.indexes),
+seeds it, runs EXPLAIN on every hot query and fails if any of them falls back to
+a full table scan. Full *index* scans (covering GROUP BYs) are allowed.
+
+    python test_query_plans.py            # MySQL, using the MYSQL_* settings
+    python test_query_plans.py --sqlite   # SQLite
+    python test_query_plans.py -v         # also print each plan
+"""
+import datetime
+import os
+import sys
+import unittest
+
+if '--sqlite' in sys.argv:
+    sys.argv.remove('--sqlite')
+    os.environ['DB_ENGINE'] = 'sqlite'
+    os.environ.setdefault('SQLITE_PATH', ':memory:')
+
+import django
+
+# Set up Django environment
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'project.settings')
+django.setup()
+
+from django.conf import settings
+from django.db import connection
+from django.test.runner import DiscoverRunner
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.db.models import Sum
+from django.utils import timezone
+
+from api.analytics import RECIPIENTS_BY_CITY, rebuild_analytics
+from api.ratings import rebuild_ratings
+from api.filters import filter_donations
+from api.trends import backfill_buckets
+from api.models import AnalyticsCounter, Credential, DonationBucket, Feedback, NGORating, Donor, Recipient, NGO, Donation, DonorStats
+
+# Schema comes straight from the models so the check does not depend on MySQL-only migrations
+settings.DATABASES['default'].setdefault('TEST', {})['MIGRATE'] = False
+
+CITIES = ['Pune', 'Mumbai', 'Delhi', 'Chennai', 'Kolkata', 'Jaipur', 'Indore', 'Surat']
+STATUSES = ['pending', 'matched', 'delivered', 'allocated']
+CATEGORIES = ['food', 'clothing', 'education', 'medical', 'other']
+
+
+def seed():
+    ngos = NGO.objects.bulk_create([
+        NGO(ngo_name=f'NGO {i}', email=f'ngo{i}@plans.test', phone='1', city=CITIES[i % len(CITIES)],
+            state='State', pincode=f'4110{i:02d}')
+        for i in range(40)
+    ])
+    donors = Donor.objects.bulk_create([
+        Donor(name=f'Donor {i}', email=f'donor{i}@plans.test', city=CITIES[i % len(CITIES)])
+        for i in range(400)
+    ])
+    Recipient.objects.bulk_create([
+        Recipient(name=f'Recipient {i}', email=f'recipient{i}@plans.test', city=CITIES[i % len(CITIES)])
+        for i in range(400)
+    ])
+    donors = list(Donor.objects.order_by('donor_id'))
+    ngos = list(NGO.objects.order_by('ngo_id'))
+    Donation.objects.bulk_create([
+        Donation(donor=donors[i % len(donors)], ngo=ngos[i % len(ngos)] if i % 3 else None,
+                 title=f'Donation {i}', category=CATEGORIES[i % len(CATEGORIES)], quantity=1 + i % 7,
+                 status=STATUSES[i % len(STATUSES)])
+        for i in range(8000)
+    ], batch_size=1000)
+    DonorStats.objects.bulk_create([DonorStats(donor=donor) for donor in donors])
+    Feedback.objects.bulk_create([
+        Feedback(user_id=i % 400, match_id=1 + i * 3, rating=1 + i % 5) for i in range(2000)
+    ])
+    Credential.objects.bulk_create([
+        Credential(email=donor.email, role='donor', user_id=donor.donor_id) for donor in donors
+    ])
+    rebuild_analytics()
+    backfill_buckets()
+    rebuild_ratings()
+    with connection.cursor() as cursor:
+        if connection.vendor == 'mysql':
+            cursor.execute(
+                'ANALYZE TABLE api_donation, api_donor, api_ngo, api_recipient, api_donorstats, api_credential, '
+                'api_analyticscounter, api_donationbucket, api_feedback, api_ngorating'
+            )
+            cursor.fetchall()
+        else:
+            cursor.execute('ANALYZE')
+
+
+def orm(queryset):
+    return queryset.query.get_compiler(connection=connection).as_sql()
+
+
+def hot_queries():
+    """Name -> (sql, params) for every query on a request or batch hot path."""
+    now = timezone.now()
+    return {
+        'donor dashboard KPI rollup': orm(DonorStats.objects.filter(donor_id=7)),
+        'donor KPI aggregate (donor_id + status)': (
+            "SELECT COUNT(*), COALESCE(SUM(quantity), 0), "
+            "SUM(CASE WHEN status='delivered' THEN 1 ELSE 0 END), "
+            "SUM(CASE WHEN status='pending' THEN 1 ELSE 0 END) "
+            "FROM api_donation WHERE donor_id = %s",
+            [7],
+        ),
+        'donations of a donor by status': orm(Donation.objects.filter(donor_id=7, status='pending')),
+        'pending donations for matching': orm(
+            Donation.objects.filter(status='pending', donation_id__gt=100).order_by('donation_id')
+            .values_list('donation_id', 'donor__city', 'donor__pincode', 'category')[:1000]
+        ),
+        'recent donations by status': orm(Donation.objects.filter(status='delivered').order_by('-created_at')[:50]),
+        'donations in a created_at range': orm(
+            Donation.objects.filter(created_at__gte=now - datetime.timedelta(days=1), created_at__lt=now)
+        ),
+        'donation list keyset page': orm(
+            Donation.objects.select_related('donor', 'ngo').filter(donation_id__gt=4000).order_by('donation_id')[:51]
+        ),
+        'donation list by category, newest first': orm(
+            filter_donations(Donation.objects.all(), {'category': 'food'}).order_by('-created_at', '-donation_id')[:51]
+        ),
+        'donation list by status': orm(
+            filter_donations(Donation.objects.all(), {'status': 'pending'}).order_by('donation_id')[:51]
+        ),
+        'donation list by category': orm(
+            filter_donations(Donation.objects.filter(donation_id__gt=100), {'category': 'food'})
+            .order_by('donation_id')[:51]
+        ),
+        'donation list by status and category': orm(
+            filter_donations(Donation.objects.all(), {'status': 'pending', 'category': 'food'})
+            .order_by('donation_id')[:51]
+        ),
+        'donation list by donor city': orm(
+            filter_donations(Donation.objects.all(), {'city': 'Pune'}).order_by('donation_id')[:51]
+        ),
+        'donation list of an NGO': orm(
+            filter_donations(Donation.objects.filter(donation_id__gt=100), {'ngo': '3'}).order_by('donation_id')[:51]
+        ),
+        'login credential lookup by email': orm(Credential.objects.filter(email='donor7@plans.test')),
+        'NGO lookup by city': orm(NGO.objects.filter(city='Pune').order_by('ngo_id')[:1]),
+        'donation trend series': orm(
+            DonationBucket.objects.filter(granularity='day', bucket_start__gte=now.date() - datetime.timedelta(days=90),
+                                          bucket_start__lte=now.date())
+            .values_list('bucket_start').annotate(n=Sum('count')).order_by()
+        ),
+        'donation trend series of a city': orm(
+            DonationBucket.objects.filter(granularity='month', city='Pune', bucket_start__gte=now.date().replace(day=1))
+            .values_list('bucket_start').annotate(n=Sum('count')).order_by()
+        ),
+        'feedback repeat check': orm(Feedback.objects.filter(match_id__in=[4, 7, 10]).values_list('match_id', 'user_id')),
+        'feedback join for rollup rebuilds': (
+            "SELECT d.donor_id, SUM(f.rating), COUNT(*) "
+            "FROM api_feedback f JOIN api_donation d ON d.donation_id = f.match_id "
+            "WHERE d.donor_id = %s GROUP BY d.donor_id",
+            [7],
+        ),
+        'NGO leaderboard': orm(
+            NGORating.objects.filter(rating_count__gte=1).order_by('-bayesian_rating', 'ngo_id')
+            .values_list('ngo_id', 'rating_count', 'rating_sum', 'bayesian_rating')[:10]
+        ),
+        'analytics counter update': orm(AnalyticsCounter.objects.filter(metric='donations_by_status', key='pending')),
+        'analytics top recipient cities': orm(
+            AnalyticsCounter.objects.filter(metric=RECIPIENTS_BY_CITY, value__gt=0).order_by('-value', 'key')[:5]
+        ),
+    }
+
+
+def explain(sql, params):
+    """Return (plan lines, tables read with a full table scan)."""
+    with connection.cursor() as cursor:
+        if connection.vendor == 'mysql':
+            cursor.execute('EXPLAIN ' + sql, params)
+            columns = [col[0] for col in cursor.description]
+            rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+            lines = [f"{r['table']}: type={r['type']} key={r['key']} rows={r['rows']} {r.get('Extra') or ''}" for r in rows]
+            return lines, [r['table'] for r in rows if r['type'] == 'ALL']
+        cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+        lines = [row[-1] for row in cursor.fetchall()]
+        # "SCAN api_x" is a table scan; "SCAN api_x USING [COVERING] INDEX ..." walks an index
+        scans = [line.split()[1] for line in lines if line.startswith('SCAN ') and ' USING ' not in line]
+        return lines, [table for table in scans if table.startswith('api_')]
+
+
+class QueryPlanTests(unittest.TestCase):
+    def test_hot_queries_use_indexes(self):
+        verbose = '-v' in sys.argv or '--verbose' in sys.argv
+        for name, (sql, params) in hot_queries().items():
+            with self.subTest(query=name):
+                lines, full_scans = explain(sql, params)
+                if verbose:
+                    print(f"\n{name}:\n    " + "\n    ".join(lines))
+                self.assertEqual(full_scans, [], f"{name} does a full table scan:\n{sql}\n" + "\n".join(lines))
+
+
+_runner = DiscoverRunner(verbosity=0)
+_old_config = None
+
+
+def setUpModule():
+    global _old_config
+    setup_test_environment()
+    _old_config = _runner.setup_databases()
+    seed()
+
+
+def tearDownModule():
+    _runner.teardown_databases(_old_config)
+    teardown_test_environment()
+
+
+if __name__ == '__main__':
+    print(f"=== Query plan checks ({connection.vendor}) ===")
+    unittest.main()
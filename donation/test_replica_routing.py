@@ -0,0 +1,141 @@
+"""
+Read-replica routing check on two local SQLite files.
+
+The primary is built from the models, then copied to the replica file to stand
+in for replication. Later writes go to the primary only, so the replica is
+stale, which shows where each read was served from.
+
+    python test_replica_routing.py
+"""
+import os
+import shutil
+import tempfile
+import unittest
+
+_tmp = tempfile.mkdtemp(prefix='replica-routing-')
+PRIMARY = os.path.join(_tmp, 'primary.sqlite3')
+REPLICA = os.path.join(_tmp, 'replica.sqlite3')
+os.environ.update(DB_ENGINE='sqlite', SQLITE_PATH=PRIMARY, SQLITE_REPLICA_PATHS=REPLICA)
+
+import django
+
+# Set up Django environment
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'project.settings')
+django.setup()
+
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.core.management import call_command
+from django.db import connections
+from django.test import Client
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+
+from api import response_cache
+from api.models import Donation, Donor
+from frontend.views import run_select
+from project.db_routers import read_alias, replica_reads
+
+# Schema straight from the models: the migrations are MySQL-only
+settings.MIGRATION_MODULES = {app: None for app in ('api', 'auth', 'contenttypes', 'sessions', 'admin')}
+
+
+def replicate():
+    connections.close_all()
+    shutil.copyfile(PRIMARY, REPLICA)
+
+
+def login(client, donor):
+    session = client.session
+    session.update({'user_id': donor.donor_id, 'user_type': 'donor'})
+    session.save()
+
+
+class ReplicaRoutingTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        call_command('migrate', run_syncdb=True, verbosity=0)
+        cls.donor = Donor.objects.create(name='Asha', email='asha@replica.test', city='Pune')
+        replicate()
+
+    def test_writes_go_to_primary(self):
+        Donor.objects.create(name='Ravi', email='ravi@replica.test', city='Pune')
+        self.assertTrue(Donor.objects.using('default').filter(email='ravi@replica.test').exists())
+        self.assertFalse(Donor.objects.using('replica1').filter(email='ravi@replica.test').exists())
+
+    def test_list_endpoint_reads_replica(self):
+        Donor.objects.create(name='Meera', email='meera@replica.test', city='Pune')
+        emails = [d['email'] for d in Client().get('/api/donors/').json()['results']]
+        self.assertIn('asha@replica.test', emails)
+        self.assertNotIn('meera@replica.test', emails)
+
+    def test_run_select_follows_view_routing(self):
+        sql = "SELECT COUNT(*) AS n FROM api_donor WHERE email = %(email)s"
+        Donor.objects.create(name='Kiran', email='kiran@replica.test', city='Pune')
+        self.assertEqual(read_alias(), 'default')
+        self.assertEqual(run_select(sql, {'email': 'kiran@replica.test'})['rows'][0]['n'], 1)
+
+        class FakeRequest:
+            method = 'GET'
+            session = {}
+        replica_view = replica_reads(lambda request: run_select(sql, {'email': 'kiran@replica.test'}))
+        self.assertEqual(replica_view(FakeRequest())['rows'][0]['n'], 0)
+
+    def test_session_reads_its_own_donation(self):
+        client = Client()
+        login(client, self.donor)
+        replicate()
+        response = client.post('/donor/', {'title': 'Rice', 'category': 'food', 'quantity': 3})
+        self.assertTrue(response.json()['success'])
+        # Pinned to the primary: the new donation shows up on the dashboard
+        self.assertEqual(client.get('/donor/').context['kpis']['total_donations'], 1)
+        # Another session for the same donor still reads the stale replica
+        other = Client()
+        login(other, self.donor)
+        replicate_session(other)
+        self.assertEqual(other.get('/donor/').context['kpis']['total_donations'], 0)
+
+    @override_settings(RESPONSE_CACHE_ETAGS=True)
+    def test_fresh_etag_renders_from_primary(self):
+        Donor.objects.create(name='Nisha', email='nisha@replica.test', city='Pune')
+        response_cache.bump('donor')
+        # The token is newer than the replication lag: this body is what the ETag stands for
+        emails = [d['email'] for d in Client().get('/api/donors/').json()['results']]
+        self.assertIn('nisha@replica.test', emails)
+        with override_settings(REPLICA_PIN_SECONDS=-1):
+            response_cache.bump('donor')
+            emails = [d['email'] for d in Client().get('/api/donors/').json()['results']]
+        self.assertNotIn('nisha@replica.test', emails)
+
+    @override_settings(RESPONSE_CACHE_ETAGS=True)
+    def test_city_filtered_list_etag_follows_donor(self):
+        donor = Donor.objects.create(name='Tara', email='tara@replica.test', city='Nashik')
+        Donation.objects.create(donor=donor, title='Dal', category='food')
+        first = Client().get('/api/donations/?city=Nashik')
+        self.assertEqual(len(first.json()['results']), 1)
+        donor.city = 'Delhi'
+        donor.save()
+        # The list reads the donor's city, so moving the donor changes its ETag
+        again = Client().get('/api/donations/?city=Nashik', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(again.status_code, 200)
+        self.assertEqual(again.json()['results'], [])
+
+
+def replicate_session(client):
+    """Copy just this client's session row to the replica, leaving its donation data stale."""
+    session = Session.objects.using('default').get(session_key=client.session.session_key)
+    session.save(using='replica1')
+
+
+def setUpModule():
+    setup_test_environment()
+
+
+def tearDownModule():
+    teardown_test_environment()
+    connections.close_all()
+    shutil.rmtree(_tmp, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    print(f"=== Replica routing checks (primary {PRIMARY}, replica {REPLICA}) ===")
+    unittest.main()